@@ -9,6 +9,7 @@ from database import get_db
 from sqlalchemy.orm import Session
 import models
 from schemas import TokenData
+from cache import LRUCache
 import hashlib
 
 # Password hashing
@@ -17,6 +18,13 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Authenticated users by id, detached from any session. Entries expire after
+# the TTL so revocations made by other workers are picked up.
+principal_cache = LRUCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
 def _hash_password_with_sha256(password: str) -> str:
     """Pre-hash password with SHA256 to ensure it never exceeds 72 bytes for bcrypt"""
     return hashlib.sha256(password.encode()).hexdigest()
@@ -48,10 +56,36 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> models.User:
+def token_claims(user: models.User, business_id: Optional[int] = None) -> dict:
+    """JWT claims identifying a user well enough to skip the database on most requests"""
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "role": user.role.value if user.role else None,
+        "bid": business_id,
+        "ver": user.token_version or 0,
+    }
+
+def revoke_cached_principal(user_id: int):
+    """Forget a cached user after changing its token version or active flag"""
+    principal_cache.pop(user_id)
+
+def _load_principal(db: Session, token_data: TokenData) -> Optional[models.User]:
+    query = db.query(models.User)
+    if token_data.user_id is not None:
+        user = query.filter(models.User.id == token_data.user_id).first()
+    else:
+        # Tokens issued before the uid claim only carry the email
+        user = query.filter(models.User.email == token_data.email).first()
+    if user is None:
+        return None
+    # Detach so the cached object is never tied to (or flushed by) a request session
+    db.expunge(user)
+    principal_cache.set(user.id, user)
+    return user
+
+async def get_token_data(token: str = Depends(oauth2_scheme)) -> TokenData:
+    """Decode and validate the bearer token; cached by FastAPI for the rest of the request"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -62,13 +96,38 @@ async def get_current_user(
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = TokenData(email=email)
+        return TokenData(
+            email=email,
+            user_id=payload.get("uid"),
+            role=payload.get("role"),
+            business_id=payload.get("bid"),
+            token_version=payload.get("ver", 0)
+        )
     except JWTError:
         raise credentials_exception
+
+def get_current_user(
+    token_data: TokenData = Depends(get_token_data),
+    db: Session = Depends(get_db)
+) -> models.User:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
     
-    user = db.query(models.User).filter(models.User.email == token_data.email).first()
+    user = principal_cache.get(token_data.user_id) if token_data.user_id is not None else None
+    if user is None:
+        user = _load_principal(db, token_data)
     if user is None:
         raise credentials_exception
+    
+    # Tokens issued before the user's last revocation are rejected
+    if token_data.token_version != (user.token_version or 0):
+        raise credentials_exception
+    
+    # Lets commits on this session be attributed to the user (read-your-writes)
+    db.info["user_id"] = user.id
     return user
 
 async def get_current_active_user(
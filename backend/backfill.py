@@ -0,0 +1,121 @@
+"""
+Maintenance commands for derived data
+
+Usage:
+    python backfill.py customer-stats [--business-id ID]
+    python backfill.py amount-paid [--business-id ID]
+    python backfill.py unit-cost [--business-id ID]
+    python backfill.py sales-rollup [--business-id ID]
+    python backfill.py token-version
+    python backfill.py indexes
+
+Each command first adds any model columns missing from existing tables
+(Base.metadata.create_all only creates new tables), then recomputes the
+derived values in one transaction.
+"""
+import argparse
+from sqlalchemy import case, func, inspect, select, text, update
+from sqlalchemy.schema import CreateColumn
+from database import Base, SessionLocal, engine
+import models
+from customer_stats import rebuild_customer_stats
+from sales_rollup import rebuild_rollup
+
+def ensure_columns(model):
+    """Add columns defined on `model` that the database table does not have yet"""
+    table = model.__table__
+    existing = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    with engine.begin() as conn:
+        for column in table.columns:
+            if column.name not in existing:
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                print(f"Added column {table.name}.{column.name}")
+
+def backfill_customer_stats(business_id=None):
+    ensure_columns(models.Customer)
+    db = SessionLocal()
+    try:
+        rebuild_customer_stats(db, business_id)
+        db.commit()
+    finally:
+        db.close()
+    print("Customer invoice counters rebuilt")
+
+def backfill_amount_paid(business_id=None):
+    ensure_columns(models.Invoice)
+    # Sum of recorded payments; invoices created as paid carry no payment rows
+    paid = select(func.sum(models.Payment.amount)).where(
+        models.Payment.invoice_id == models.Invoice.id
+    ).scalar_subquery()
+    stmt = update(models.Invoice).values(
+        amount_paid=case(
+            (paid.isnot(None), paid),
+            (models.Invoice.payment_status == models.PaymentStatus.PAID, models.Invoice.grand_total),
+            else_=0
+        )
+    )
+    if business_id:
+        stmt = stmt.where(models.Invoice.business_id == business_id)
+    with engine.begin() as conn:
+        conn.execute(stmt)
+    print("Invoice amount_paid rebuilt")
+
+def backfill_unit_cost(business_id=None):
+    ensure_columns(models.InvoiceItem)
+    # Lines sold before unit_cost existed take the product's current buying price
+    buying_price = select(models.Product.buying_price).where(
+        models.Product.id == models.InvoiceItem.product_id
+    ).scalar_subquery()
+    stmt = update(models.InvoiceItem).values(unit_cost=buying_price).where(
+        models.InvoiceItem.unit_cost.is_(None)
+    )
+    if business_id:
+        stmt = stmt.where(models.InvoiceItem.invoice_id.in_(
+            select(models.Invoice.id).where(models.Invoice.business_id == business_id)
+        ))
+    with engine.begin() as conn:
+        conn.execute(stmt)
+    print("Invoice item unit_cost backfilled")
+
+def backfill_sales_rollup(business_id=None):
+    db = SessionLocal()
+    try:
+        rebuild_rollup(db, business_id)
+        db.commit()
+    finally:
+        db.close()
+    print("Daily sales rollup rebuilt")
+
+def backfill_token_version(business_id=None):
+    ensure_columns(models.User)
+    with engine.begin() as conn:
+        conn.execute(
+            update(models.User).where(models.User.token_version.is_(None)).values(token_version=0)
+        )
+    print("User token_version backfilled")
+
+def backfill_indexes(business_id=None):
+    # create_all skips indexes on tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    print("Missing indexes created")
+
+COMMANDS = {
+    "customer-stats": backfill_customer_stats,
+    "amount-paid": backfill_amount_paid,
+    "unit-cost": backfill_unit_cost,
+    "sales-rollup": backfill_sales_rollup,
+    "token-version": backfill_token_version,
+    "indexes": backfill_indexes,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild derived data")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--business-id", type=int, default=None)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    COMMANDS[args.command](args.business_id)
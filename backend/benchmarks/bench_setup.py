@@ -0,0 +1,96 @@
+"""Shared setup for the benchmark scripts: a throwaway database and a signed-in client"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+_tmp_dir = tempfile.mkdtemp(prefix="invoice_bench_")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_tmp_dir}/bench.db")
+os.environ["PDF_CACHE_DIR"] = os.path.join(_tmp_dir, "pdf_cache")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+import main
+import models
+from database import SessionLocal, engine
+
+if engine.dialect.name == "sqlite":
+    # Serialize writers on SQLite the way row locks do on PostgreSQL
+    @event.listens_for(engine, "connect")
+    def _sqlite_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        dbapi_connection.execute("PRAGMA busy_timeout = 30000")
+
+    @event.listens_for(engine, "begin")
+    def _sqlite_begin(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    engine.dispose()
+
+def signed_in_client(name: str = "bench"):
+    """A test client and auth headers for a new user"""
+    client = TestClient(main.app)
+    email = f"{name}@example.com"
+    client.post("/api/auth/signup", json={
+        "email": email, "username": name, "full_name": name, "password": "secret1"
+    })
+    token = client.post(
+        "/api/auth/login", data={"username": email, "password": "secret1"}
+    ).json()["access_token"]
+    return client, {"Authorization": f"Bearer {token}"}
+
+def create_products(client, headers, count: int, stock: int):
+    product_ids = []
+    for i in range(count):
+        response = client.post("/api/products/", json={
+            "product_name": f"Product {i}", "sku": f"BENCH-{i}", "unit": "pc",
+            "buying_price": 5, "selling_price": 10, "current_stock": stock,
+        }, headers=headers)
+        product_ids.append(response.json()["id"])
+    return product_ids
+
+def seed_invoices(business_id: int, product_id: int, count: int, batch: int = 10000):
+    """Bulk insert `count` one-line invoices straight into the tables"""
+    created_at = datetime.utcnow()
+    prefix = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        for offset in range(0, count, batch):
+            invoice_ids = db.scalars(insert(models.Invoice).returning(models.Invoice.id), [{
+                "business_id": business_id,
+                "invoice_number": f"SEED-{prefix}-{i}",
+                "subtotal": 100,
+                "tax_amount": 18,
+                "grand_total": 118,
+                "payment_method": models.PaymentMethod.CASH,
+                "payment_status": models.PaymentStatus.PAID,
+                "created_at": created_at,
+            } for i in range(offset, min(offset + batch, count))]).all()
+            db.execute(insert(models.InvoiceItem), [{
+                "invoice_id": invoice_id,
+                "product_id": product_id,
+                "quantity": 10,
+                "unit_price": 10,
+                "unit_cost": 5,
+                "tax_percentage": 18,
+                "tax_amount": 18,
+                "total_amount": 118,
+            } for invoice_id in invoice_ids])
+        db.commit()
+    finally:
+        db.close()
+
+def measure(fn):
+    """Python heap peak (KiB) and wall time (ms) of one call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024, elapsed * 1000
@@ -0,0 +1,51 @@
+"""
+Round trips and latency of POST /api/invoices/ by number of line items
+
+Usage (from the backend directory):
+    python benchmarks/invoice_create.py [invoices_per_size]
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+"""
+import statistics
+import sys
+import time
+
+from bench_setup import create_products, signed_in_client
+from sqlalchemy import event
+
+from database import engine
+
+LINE_COUNTS = (1, 10, 40, 100)
+
+def main_benchmark(invoices_per_size: int):
+    client, headers = signed_in_client()
+    product_ids = create_products(client, headers, max(LINE_COUNTS), stock=10 ** 9)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def create(lines: int):
+        return client.post("/api/invoices/", json={
+            "items": [
+                {"product_id": product_id, "quantity": 1, "unit_price": 10, "tax_percentage": 18}
+                for product_id in product_ids[:lines]
+            ],
+            "payment_method": "cash",
+        }, headers=headers)
+
+    create(1)  # warm the counter, rollup row and principal caches
+
+    print(f"{'lines':>6} {'round trips':>12} {'p50 ms':>8} {'p95 ms':>8}")
+    for lines in LINE_COUNTS:
+        timings = []
+        statements.clear()
+        for _ in range(invoices_per_size):
+            start = time.perf_counter()
+            response = create(lines)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.text
+        p95 = statistics.quantiles(timings, n=20)[-1]
+        print(f"{lines:>6} {len(statements) / invoices_per_size:>12.1f} {statistics.median(timings):>8.1f} {p95:>8.1f}")
+
+if __name__ == "__main__":
+    main_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
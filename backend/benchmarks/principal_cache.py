@@ -0,0 +1,46 @@
+"""
+Statements and latency of an authenticated request with and without the principal cache
+
+Usage (from the backend directory):
+    python benchmarks/principal_cache.py [requests]
+
+Calls GET /api/auth/me, which does nothing beyond authentication, first with
+the principal cache disabled (every request loads the user) and then with it
+enabled. Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+"""
+import statistics
+import sys
+import time
+
+from bench_setup import signed_in_client
+from sqlalchemy import event
+
+from auth import principal_cache
+from database import engine
+
+def main_benchmark(requests: int):
+    client, headers = signed_in_client()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    max_entries = principal_cache.max_entries
+    print(f"{'cache':>6} {'statements':>11} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, entries in (("off", 0), ("on", max_entries)):
+        principal_cache.clear()
+        principal_cache.max_entries = entries
+        client.get("/api/auth/me", headers=headers)  # warm the connection pool and the cache
+
+        timings = []
+        statements.clear()
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.get("/api/auth/me", headers=headers)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.text
+        p95 = statistics.quantiles(timings, n=20)[-1]
+        print(f"{label:>6} {len(statements) / requests:>11.1f} {statistics.median(timings):>8.2f} {p95:>8.2f}")
+    principal_cache.max_entries = max_entries
+
+if __name__ == "__main__":
+    main_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,62 @@
+"""
+Render time and size of the A4 invoice PDF against the thermal receipts
+
+Usage (from the backend directory):
+    python benchmarks/receipt_render.py [renders_per_layout]
+
+Creates invoices with a few line counts, then renders each one directly with
+generate_invoice_pdf and generate_receipt_pdf at 80 and 58 mm, bypassing the
+PDF cache. Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+"""
+import statistics
+import sys
+import time
+
+from bench_setup import create_products, signed_in_client
+
+import models
+from database import SessionLocal
+from pdf_generator import generate_invoice_pdf, generate_receipt_pdf
+
+LINE_COUNTS = (1, 10, 40)
+
+LAYOUTS = {
+    "invoice": lambda invoice, business: generate_invoice_pdf(invoice, business, invoice.customer),
+    "receipt-80": lambda invoice, business: generate_receipt_pdf(invoice, business, invoice.customer, 80),
+    "receipt-58": lambda invoice, business: generate_receipt_pdf(invoice, business, invoice.customer, 58),
+}
+
+def main_benchmark(renders: int):
+    client, headers = signed_in_client()
+    product_ids = create_products(client, headers, max(LINE_COUNTS), stock=10 ** 6)
+
+    invoice_ids = {}
+    for lines in LINE_COUNTS:
+        response = client.post("/api/invoices/", json={
+            "items": [
+                {"product_id": product_id, "quantity": 1, "unit_price": 10, "tax_percentage": 18}
+                for product_id in product_ids[:lines]
+            ],
+            "payment_method": "cash",
+        }, headers=headers)
+        assert response.status_code == 200, response.text
+        invoice_ids[lines] = response.json()["id"]
+
+    db = SessionLocal()
+    try:
+        print(f"{'lines':>6} {'layout':>11} {'p50 ms':>8} {'bytes':>8}")
+        for lines, invoice_id in invoice_ids.items():
+            invoice = db.get(models.Invoice, invoice_id)
+            business = db.get(models.Business, invoice.business_id)
+            for layout, render in LAYOUTS.items():
+                timings = []
+                for _ in range(renders):
+                    start = time.perf_counter()
+                    size = len(render(invoice, business).getvalue())
+                    timings.append((time.perf_counter() - start) * 1000)
+                print(f"{lines:>6} {layout:>11} {statistics.median(timings):>8.1f} {size:>8}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,47 @@
+"""
+Peak memory of the sales summary as invoices grow
+
+Usage (from the backend directory):
+    python benchmarks/report_memory.py [invoices ...]
+
+Seeds one-line invoices in steps up to each count, rebuilds the daily
+rollup, then measures the Python heap peak (tracemalloc) of a yearly
+summary request.
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+"""
+import sys
+
+from bench_setup import create_products, measure, seed_invoices, signed_in_client
+
+from database import SessionLocal
+from report_cache import report_cache
+from sales_rollup import rebuild_rollup
+
+def main_benchmark(sizes):
+    client, headers = signed_in_client()
+    product_id = create_products(client, headers, 1, stock=0)[0]
+    business_id = client.get("/api/businesses/", headers=headers).json()[0]["id"]
+
+    def sales_summary():
+        report_cache.bump(business_id)
+        response = client.get("/api/reports/sales/summary?period=yearly", headers=headers)
+        assert response.status_code == 200, response.text
+
+    print(f"{'invoices':>9} {'peak KiB':>9} {'ms':>7}")
+    seeded = 0
+    for size in sizes:
+        seed_invoices(business_id, product_id, size - seeded)
+        seeded = size
+        db = SessionLocal()
+        try:
+            rebuild_rollup(db, business_id)
+            db.commit()
+        finally:
+            db.close()
+
+        peak_kib, elapsed_ms = measure(sales_summary)
+        print(f"{size:>9} {peak_kib:>9.0f} {elapsed_ms:>7.1f}")
+
+if __name__ == "__main__":
+    main_benchmark([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
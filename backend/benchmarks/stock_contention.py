@@ -0,0 +1,52 @@
+"""
+Invoice throughput while many tills sell the same few products
+
+Usage (from the backend directory):
+    python benchmarks/stock_contention.py [threads] [invoices]
+
+Every bill takes one unit of each hot product, in a shuffled order. Prints
+invoices per second, how many sales were refused for stock, and the final
+stock, which must never go negative.
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+"""
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_setup import create_products, signed_in_client
+
+HOT_PRODUCTS = 5
+
+def main_benchmark(threads: int, invoices: int):
+    client, headers = signed_in_client()
+    stock = invoices * 3 // 4
+    product_ids = create_products(client, headers, HOT_PRODUCTS, stock=stock)
+
+    def sell(_):
+        lines = random.sample(product_ids, len(product_ids))
+        return client.post("/api/invoices/", json={
+            "items": [
+                {"product_id": product_id, "quantity": 1, "unit_price": 10, "tax_percentage": 18}
+                for product_id in lines
+            ],
+            "payment_method": "cash",
+        }, headers=headers).status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        statuses = list(pool.map(sell, range(invoices)))
+    elapsed = time.perf_counter() - start
+
+    final_stock = [p["current_stock"] for p in client.get("/api/products/", headers=headers).json()]
+    print(f"threads={threads} invoices={invoices} stock={stock}")
+    print(f"sold={statuses.count(200)} refused={statuses.count(400)} other={len(statuses) - statuses.count(200) - statuses.count(400)}")
+    print(f"throughput={invoices / elapsed:.1f} invoices/s final_stock={final_stock}")
+    assert min(final_stock) >= 0
+
+if __name__ == "__main__":
+    main_benchmark(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 16,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 400,
+    )
@@ -0,0 +1,41 @@
+"""
+Peak memory of the GST CSV export as invoices grow
+
+Usage (from the backend directory):
+    python benchmarks/tax_csv_memory.py [invoices ...]
+
+Seeds one-line invoices in steps up to each count, then measures the
+Python heap peak (tracemalloc) while the whole CSV stream is consumed.
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+"""
+import sys
+
+from bench_setup import create_products, measure, seed_invoices, signed_in_client
+
+from database import SessionLocal
+from routes.reports import _tax_csv_rows
+
+def main_benchmark(sizes):
+    client, headers = signed_in_client()
+    product_id = create_products(client, headers, 1, stock=0)[0]
+    business_id = client.get("/api/businesses/", headers=headers).json()[0]["id"]
+
+    def tax_csv():
+        db = SessionLocal()
+        try:
+            for _ in _tax_csv_rows(db, business_id, None, None):
+                pass
+        finally:
+            db.close()
+
+    print(f"{'invoices':>9} {'peak KiB':>9} {'ms':>8}")
+    seeded = 0
+    for size in sizes:
+        seed_invoices(business_id, product_id, size - seeded)
+        seeded = size
+        peak_kib, elapsed_ms = measure(tax_csv)
+        print(f"{size:>9} {peak_kib:>9.0f} {elapsed_ms:>8.0f}")
+
+if __name__ == "__main__":
+    main_benchmark([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
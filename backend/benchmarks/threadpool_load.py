@@ -0,0 +1,103 @@
+"""
+Load test: concurrent authenticated requests against one uvicorn worker
+
+Usage (from the backend directory):
+    python benchmarks/threadpool_load.py [clients] [requests] [path]
+
+Starts uvicorn on a throwaway SQLite database (or BENCH_DATABASE_URL) with
+the principal cache disabled, so every request runs the auth lookup, then
+hammers `path` (default /api/products/) from `clients` threads. Prints
+throughput and latency percentiles. Set THREADPOOL_SIZE in the environment
+to compare thread pool sizes.
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(port: int) -> subprocess.Popen:
+    tmp_dir = tempfile.mkdtemp(prefix="invoice_load_")
+    env = {
+        **os.environ,
+        "DATABASE_URL": os.getenv("BENCH_DATABASE_URL", f"sqlite:///{tmp_dir}/load.db"),
+        "PDF_CACHE_DIR": os.path.join(tmp_dir, "pdf_cache"),
+        "PRINCIPAL_CACHE_MAX_ENTRIES": "0",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+def main_benchmark(clients: int, total: int, path: str):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    server = start_server(port)
+    try:
+        client = httpx.Client(base_url=base, timeout=30, limits=httpx.Limits(max_connections=clients))
+        client.post("/api/auth/signup", json={
+            "email": "load@example.com", "username": "load", "full_name": "Load", "password": "secret1"
+        })
+        token = client.post(
+            "/api/auth/login", data={"username": "load@example.com", "password": "secret1"}
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        for i in range(20):
+            client.post("/api/products/", json={
+                "product_name": f"Product {i}", "sku": f"LOAD-{i}", "unit": "pc",
+                "buying_price": 5, "selling_price": 10, "current_stock": 100,
+            }, headers=headers)
+
+        def call(_):
+            start = time.perf_counter()
+            try:
+                status = client.get(path, headers=headers).status_code
+            except httpx.HTTPError:
+                status = None
+            return status, (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            results = list(pool.map(call, range(total)))
+        elapsed = time.perf_counter() - start
+        client.close()
+
+        timings = sorted(ms for status, ms in results if status == 200)
+        failed = total - len(timings)
+        print(f"clients={clients} requests={total} path={path} THREADPOOL_SIZE={os.getenv('THREADPOOL_SIZE', '0')}")
+        if timings:
+            p99 = statistics.quantiles(timings, n=100)[-1] if len(timings) > 1 else timings[0]
+            print(f"{len(timings) / elapsed:.0f} req/s  p50 {statistics.median(timings):.0f} ms  "
+                  f"p99 {p99:.0f} ms  failed {failed}")
+        else:
+            print(f"no successful requests, failed {failed}")
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main_benchmark(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 32,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2000,
+        sys.argv[3] if len(sys.argv) > 3 else "/api/products/",
+    )
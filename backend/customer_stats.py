@@ -0,0 +1,106 @@
+from typing import Optional
+from sqlalchemy import case, cast, func, literal, update
+from sqlalchemy.orm import Session
+import models
+
+_STATUS_COUNTERS = {
+    models.PaymentStatus.PAID: models.Customer.paid_invoice_count,
+    models.PaymentStatus.PARTIAL: models.Customer.partial_invoice_count,
+    models.PaymentStatus.UNPAID: models.Customer.unpaid_invoice_count,
+}
+
+def derive_payment_status(paid: int, partial: int, unpaid: int) -> models.PaymentStatus:
+    """Overall customer status from per-status invoice counts"""
+    if partial:
+        return models.PaymentStatus.PARTIAL
+    if paid and not unpaid:
+        return models.PaymentStatus.PAID
+    return models.PaymentStatus.UNPAID
+
+def invoice_balance(grand_total: Optional[float], amount_paid: Optional[float]) -> float:
+    """What an invoice adds to its customer's total_outstanding"""
+    return (grand_total or 0) - (amount_paid or 0)
+
+def _status(value) -> Optional[models.PaymentStatus]:
+    if value is None:
+        return None
+    return models.PaymentStatus(value.value if hasattr(value, "value") else str(value).lower())
+
+def record_invoice_change(
+    db: Session,
+    customer_id: Optional[int],
+    old_status=None,
+    new_status=None,
+    purchases: float = 0,
+    outstanding: float = 0,
+):
+    """
+    Apply one invoice write to its customer's counters
+
+    Moves the invoice from `old_status` to `new_status` (either may be None
+    for a created or deleted invoice), adjusts the purchase and outstanding
+    totals, and re-derives the customer's payment status, all in a single
+    UPDATE inside the caller's transaction.
+    """
+    if not customer_id:
+        return
+
+    old_status, new_status = _status(old_status), _status(new_status)
+    counts = {}
+    for status, column in _STATUS_COUNTERS.items():
+        delta = (status == new_status) - (status == old_status)
+        counts[column.key] = func.coalesce(column, 0) + delta
+
+    paid = counts["paid_invoice_count"]
+    partial = counts["partial_invoice_count"]
+    unpaid = counts["unpaid_invoice_count"]
+    status_type = models.Customer.payment_status.type
+
+    def status_value(status):
+        # Cast, or PostgreSQL types a CASE of bare literals as text
+        return cast(literal(status, status_type), status_type)
+
+    payment_status = case(
+        (partial > 0, status_value(models.PaymentStatus.PARTIAL)),
+        ((paid > 0) & (unpaid == 0), status_value(models.PaymentStatus.PAID)),
+        else_=status_value(models.PaymentStatus.UNPAID),
+    )
+
+    db.execute(
+        update(models.Customer)
+        .where(models.Customer.id == customer_id)
+        .values(
+            **counts,
+            total_purchases=func.coalesce(models.Customer.total_purchases, 0) + purchases,
+            total_outstanding=func.coalesce(models.Customer.total_outstanding, 0) + outstanding,
+            payment_status=payment_status,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def rebuild_customer_stats(db: Session, business_id: Optional[int] = None):
+    """Recompute every customer's invoice counters and status from its invoices"""
+    query = db.query(
+        models.Invoice.customer_id,
+        models.Invoice.payment_status,
+        func.count(models.Invoice.id)
+    ).filter(models.Invoice.customer_id.isnot(None))
+    customers = db.query(models.Customer)
+    if business_id:
+        query = query.filter(models.Invoice.business_id == business_id)
+        customers = customers.filter(models.Customer.business_id == business_id)
+
+    counts = {}
+    for customer_id, status, count in query.group_by(models.Invoice.customer_id, models.Invoice.payment_status):
+        by_status = counts.setdefault(customer_id, {})
+        status = _status(status) or models.PaymentStatus.UNPAID
+        by_status[status] = by_status.get(status, 0) + count
+
+    for customer in customers.all():
+        by_status = counts.get(customer.id, {})
+        customer.paid_invoice_count = by_status.get(models.PaymentStatus.PAID, 0)
+        customer.partial_invoice_count = by_status.get(models.PaymentStatus.PARTIAL, 0)
+        customer.unpaid_invoice_count = by_status.get(models.PaymentStatus.UNPAID, 0)
+        customer.payment_status = derive_payment_status(
+            customer.paid_invoice_count, customer.partial_invoice_count, customer.unpaid_invoice_count
+        )
@@ -1,13 +1,90 @@
-from sqlalchemy import create_engine
+from typing import Optional
+from fastapi import Depends
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from config import settings
 
+def _engine_options(url: str) -> dict:
+    options = {
+        "echo": settings.SQL_ECHO,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    backend = make_url(url).get_backend_name()
+    if backend != "sqlite":
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    if backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        # Server-side limit applied to every connection in the pool
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
 # Create database engine
-engine = create_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL))
+
+# Read-only replica, when configured
+replica_engine = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_engine(settings.DATABASE_REPLICA_URL, **_engine_options(settings.DATABASE_REPLICA_URL))
+
+def pool_status() -> dict:
+    """Connection pool counters for monitoring"""
+    pool = engine.pool
+    status = {"class": type(pool).__name__, "capacity": pool_capacity()}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            status[name] = getattr(pool, name)()
+    return status
+
+def pool_capacity():
+    """Most connections the primary pool hands out at once, or None when unbounded"""
+    if make_url(settings.DATABASE_URL).get_backend_name() == "sqlite" or settings.DB_MAX_OVERFLOW < 0:
+        # SQLite keeps SQLAlchemy's default pool; the DB_POOL_* settings do not apply
+        return None
+    return settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+
+# Connections a request thread may check out besides its own session's:
+# reserving an invoice number block opens a second session mid-transaction
+NESTED_SESSIONS_PER_REQUEST = 1
+
+def request_thread_capacity():
+    """
+    Request threads the primary pool can serve without starving itself
 
-# Create session factory
+    Leaves room for the dashboard widget threads, which hold connections of
+    their own, and for one nested session, so a thread that already holds a
+    connection can always get its second one.
+    """
+    capacity = pool_capacity()
+    if capacity is None:
+        return None
+    return max(1, capacity - settings.DASHBOARD_WORKERS - NESTED_SESSIONS_PER_REQUEST)
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReplicaSessionLocal = None
+if replica_engine is not None:
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+def _set_local_statement_timeout(connection, timeout_ms: int):
+    # Lasts until the connection's current transaction ends
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+def _apply_statement_timeout(session, transaction, connection):
+    # Per-session override set by statement_timeout(); lasts for the transaction
+    timeout_ms = session.info.get("statement_timeout_ms")
+    if timeout_ms:
+        _set_local_statement_timeout(connection, timeout_ms)
+
+for factory in (SessionLocal, ReplicaSessionLocal):
+    if factory is not None:
+        event.listen(factory, "after_begin", _apply_statement_timeout)
 
 # Create base model
 Base = declarative_base()
@@ -19,3 +96,19 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def statement_timeout(timeout_ms: Optional[int], session_dependency=get_db):
+    """
+    Dependency that limits how long the request's queries may run
+
+    Applies to the session shared through `session_dependency`, and only
+    takes effect on PostgreSQL: right away when auth or tenant lookups have
+    already opened the session's transaction, otherwise when it first opens
+    one.
+    """
+    def apply(db: Session = Depends(session_dependency)):
+        if timeout_ms:
+            db.info["statement_timeout_ms"] = timeout_ms
+            if db.in_transaction():
+                _set_local_statement_timeout(db.connection(), timeout_ms)
+    return apply
@@ -1,8 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from anyio import to_thread
 from config import settings
-from database import Base, engine
+from database import Base, engine, pool_status, request_thread_capacity
 from routes import auth, products, customers, invoices, reports, businesses
 import os
 #app = FastAPI()
@@ -31,10 +32,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 # Add GZIP middleware for response compression
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+@app.on_event("startup")
+async def configure_threadpool():
+    # Sync handlers and dependencies (every DB query) run on this pool
+    limiter = to_thread.current_default_thread_limiter()
+    limiter.total_tokens = settings.THREADPOOL_SIZE or request_thread_capacity() or 40
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(products.router)
@@ -48,6 +56,10 @@ app.include_router(businesses.router)
 async def health_check():
     return {"status": "healthy", "service": "Invoice Management API"}
 
+@app.get("/health/db", tags=["Health"])
+def database_pool_status():
+    return pool_status()
+
 #get routes
 @app.get("/__routes__")
 def list_routes():
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, ForeignKey, Text, Index, func, Enum as SQLEnum
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.hybrid import hybrid_property
 from database import Base
 from datetime import datetime
 import enum
@@ -34,6 +35,7 @@ class User(Base):
     hashed_password = Column(String(255))
     role = Column(SQLEnum(UserRole), default=UserRole.STAFF)
     is_active = Column(Boolean, default=True)
+    token_version = Column(Integer, default=0)  # Bumped to revoke issued tokens
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -46,7 +48,7 @@ class Business(Base):
     __tablename__ = "businesses"
     
     id = Column(Integer, primary_key=True, index=True)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     business_name = Column(String(255), nullable=False)
     address = Column(Text)
     gstin = Column(String(20))
@@ -65,6 +67,13 @@ class Business(Base):
     customers = relationship("Customer", back_populates="business")
     invoices = relationship("Invoice", back_populates="business")
 
+# Invoice Number Counter Model
+class InvoiceCounter(Base):
+    __tablename__ = "invoice_counters"
+    
+    business_id = Column(Integer, ForeignKey("businesses.id"), primary_key=True)
+    last_number = Column(Integer, nullable=False, default=0)
+
 # Product/Item Model
 class Product(Base):
     __tablename__ = "products"
@@ -85,6 +94,11 @@ class Product(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Keyset pagination index for newest-first listings
+    __table_args__ = (
+        Index("ix_products_business_created_id", "business_id", "created_at", "id"),
+    )
+    
     # Relationships
     business = relationship("Business", back_populates="products")
     stock_histories = relationship("StockHistory", back_populates="product")
@@ -122,10 +136,19 @@ class Customer(Base):
     total_purchases = Column(Float, default=0)
     total_outstanding = Column(Float, default=0)
     payment_status = Column(SQLEnum(PaymentStatus), default=PaymentStatus.UNPAID)
+    # Invoice counts per status, maintained with every invoice/payment write
+    paid_invoice_count = Column(Integer, default=0)
+    partial_invoice_count = Column(Integer, default=0)
+    unpaid_invoice_count = Column(Integer, default=0)
     is_blocked = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Keyset pagination index for newest-first listings
+    __table_args__ = (
+        Index("ix_customers_business_created_id", "business_id", "created_at", "id"),
+    )
+    
     # Relationships
     business = relationship("Business", back_populates="customers")
     invoices = relationship("Invoice", back_populates="customer")
@@ -142,6 +165,7 @@ class Invoice(Base):
     tax_amount = Column(Float, default=0)
     discount_amount = Column(Float, default=0)
     grand_total = Column(Float, default=0)
+    amount_paid = Column(Float, default=0)  # Running sum of payments, updated atomically
     payment_method = Column(SQLEnum(PaymentMethod))
     payment_status = Column(SQLEnum(PaymentStatus), default=PaymentStatus.UNPAID)
     notes = Column(Text)
@@ -149,22 +173,37 @@ class Invoice(Base):
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Keyset pagination index for newest-first listings
+    __table_args__ = (
+        Index("ix_invoices_business_created_id", "business_id", "created_at", "id"),
+        Index("ix_invoices_customer_created", "customer_id", "created_at"),
+    )
+    
     # Relationships
     business = relationship("Business", back_populates="invoices")
     customer = relationship("Customer", back_populates="invoices")
     created_by_user = relationship("User", back_populates="invoices")
     items = relationship("InvoiceItem", back_populates="invoice", cascade="all, delete-orphan")
     payments = relationship("Payment", back_populates="invoice", cascade="all, delete-orphan")
+    
+    @hybrid_property
+    def balance_due(self):
+        return (self.grand_total or 0) - (self.amount_paid or 0)
+    
+    @balance_due.expression
+    def balance_due(cls):
+        return cls.grand_total - func.coalesce(cls.amount_paid, 0)
 
 # Invoice Item Model
 class InvoiceItem(Base):
     __tablename__ = "invoice_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=False)
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     quantity = Column(Float, nullable=False)
     unit_price = Column(Float, nullable=False)
+    unit_cost = Column(Float)  # Product buying price captured at sale time
     tax_percentage = Column(Float, default=0)
     tax_amount = Column(Float, default=0)
     total_amount = Column(Float, nullable=False)
@@ -187,3 +226,15 @@ class Payment(Base):
     
     # Relationships
     invoice = relationship("Invoice", back_populates="payments")
+
+# Daily Sales Rollup Model
+class DailySalesRollup(Base):
+    __tablename__ = "daily_sales_rollup"
+    
+    business_id = Column(Integer, ForeignKey("businesses.id"), primary_key=True)
+    local_date = Column(Date, primary_key=True)  # Calendar date in BUSINESS_TIMEZONE
+    revenue = Column(Float, nullable=False, default=0)
+    tax = Column(Float, nullable=False, default=0)
+    discount = Column(Float, nullable=False, default=0)
+    cost = Column(Float, nullable=False, default=0)
+    order_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,46 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) position as an opaque cursor token"""
+    payload = json.dumps([created_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    """Decode a cursor token back into (created_at, id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def paginate(query, model, skip: int, limit: int, cursor: Optional[str] = None):
+    """
+    Order a query newest first and apply offset or keyset pagination
+
+    When a cursor is given the page starts right after the encoded position,
+    so the (business_id, created_at, id) index serves deep pages as cheaply
+    as the first one. Otherwise `skip` is used as a plain offset.
+    """
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        return query.filter(
+            tuple_(model.created_at, model.id) < tuple_(created_at, row_id)
+        ).limit(limit)
+
+    return query.offset(skip).limit(limit)
+
+def set_next_cursor(response: Response, rows: list, limit: int):
+    """Expose the cursor for the following page when this page is full"""
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
@@ -0,0 +1,157 @@
+import glob
+import hashlib
+import os
+import threading
+from typing import Optional
+from cache import LRUCache
+from config import settings
+
+def invoice_pdf_version(invoice, business, customer=None, layout: str = "invoice") -> str:
+    """
+    Hash every field that ends up on the rendered PDF
+
+    Any change to the invoice, its items, its payment status, the customer or
+    the business header produces a new version, so stale renders are never
+    served even when a write path forgets to invalidate.
+    """
+    fields = [
+        layout,
+        invoice.id,
+        invoice.invoice_number,
+        invoice.created_at,
+        invoice.updated_at,
+        invoice.subtotal,
+        invoice.tax_amount,
+        invoice.discount_amount,
+        invoice.grand_total,
+        invoice.payment_method,
+        invoice.payment_status,
+        invoice.notes,
+    ]
+    for item in invoice.items:
+        fields.append((
+            item.product.product_name if item.product else None,
+            item.quantity,
+            item.unit_price,
+            item.tax_percentage,
+            item.tax_amount,
+            item.total_amount,
+        ))
+    if business:
+        fields.append((business.business_name, business.updated_at))
+    if customer:
+        fields.append((
+            customer.customer_name,
+            customer.email,
+            customer.phone,
+            customer.address,
+            customer.city,
+            customer.state,
+            customer.pincode,
+        ))
+    return hashlib.sha256(repr(fields).encode()).hexdigest()[:32]
+
+class PdfCache:
+    """
+    Two-tier cache of rendered invoice PDFs
+
+    A bounded in-memory LRU sits in front of a directory of PDF files whose
+    total size is capped; the least recently used files are removed first.
+    """
+
+    def __init__(self, memory_bytes: int, directory: Optional[str], disk_bytes: int):
+        self.memory = LRUCache(max_entries=10000, max_bytes=memory_bytes, sizeof=len)
+        self.directory = directory or None
+        self.disk_bytes = disk_bytes
+        self._disk_used = None
+        self._lock = threading.Lock()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, invoice_id: int, version: str) -> Optional[bytes]:
+        key = (invoice_id, version)
+        data = self.memory.get(key)
+        if data is not None or not self.directory:
+            return data
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        self.memory.set(key, data)
+        return data
+
+    def put(self, invoice_id: int, version: str, data: bytes):
+        key = (invoice_id, version)
+        self.memory.set(key, data)
+        if not self.directory:
+            return
+
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        with self._lock:
+            if self._disk_used is None:
+                self._disk_used = self._scan_disk()
+            else:
+                self._disk_used += len(data)
+            if self._disk_used > self.disk_bytes:
+                self._evict_disk()
+
+    def invalidate(self, invoice_id: int):
+        """Drop every cached render of an invoice"""
+        self.memory.discard_where(lambda key: key[0] == invoice_id)
+        if self.directory:
+            for path in glob.glob(os.path.join(self.directory, f"{invoice_id}-*.pdf")):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _path(self, key) -> str:
+        invoice_id, version = key
+        return os.path.join(self.directory, f"{invoice_id}-{version}.pdf")
+
+    def _files(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pdf"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _scan_disk(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+    def _evict_disk(self):
+        # Remove least recently used files until the tier is back under 90% of its budget
+        files = sorted(self._files())
+        used = sum(size for _, size, _ in files)
+        target = self.disk_bytes * 0.9
+        for _, size, path in files:
+            if used <= target:
+                break
+            try:
+                os.remove(path)
+                used -= size
+            except OSError:
+                pass
+        self._disk_used = used
+
+pdf_cache = PdfCache(
+    memory_bytes=settings.PDF_CACHE_MEMORY_BYTES,
+    directory=settings.PDF_CACHE_DIR,
+    disk_bytes=settings.PDF_CACHE_DISK_BYTES,
+)
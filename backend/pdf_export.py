@@ -0,0 +1,160 @@
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+from typing import Iterator, List
+from sqlalchemy.orm import joinedload
+from database import SessionLocal
+import models
+from pdf_cache import pdf_cache, invoice_pdf_version
+from pdf_generator import generate_invoice_pdf
+
+# Invoices loaded from the database per batch
+BATCH_SIZE = 50
+RENDER_WORKERS = os.cpu_count() or 1
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Create the shared render pool on first use, one worker per CPU"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+def _render_pdf(invoice, business, customer) -> bytes:
+    return generate_invoice_pdf(invoice, business, customer).getvalue()
+
+def _snapshot(invoice, business, customer):
+    """Copy the fields the PDF needs into plain objects that can be sent to a worker process"""
+    items = [
+        SimpleNamespace(
+            product=SimpleNamespace(product_name=item.product.product_name) if item.product else None,
+            quantity=item.quantity,
+            unit_price=item.unit_price,
+            tax_percentage=item.tax_percentage,
+            tax_amount=item.tax_amount,
+            total_amount=item.total_amount,
+        )
+        for item in invoice.items
+    ]
+    invoice_data = SimpleNamespace(
+        invoice_number=invoice.invoice_number,
+        created_at=invoice.created_at,
+        subtotal=invoice.subtotal,
+        tax_amount=invoice.tax_amount,
+        discount_amount=invoice.discount_amount,
+        grand_total=invoice.grand_total,
+        payment_method=invoice.payment_method,
+        payment_status=invoice.payment_status,
+        notes=invoice.notes,
+        items=items,
+    )
+    business_data = SimpleNamespace(business_name=business.business_name) if business else None
+    customer_data = None
+    if customer:
+        customer_data = SimpleNamespace(
+            customer_name=customer.customer_name,
+            email=customer.email,
+            phone=customer.phone,
+            address=customer.address,
+            city=customer.city,
+            state=customer.state,
+            pincode=customer.pincode,
+        )
+    return invoice_data, business_data, customer_data
+
+class _Done:
+    """Stand-in for a future whose result is already known (cache hit)"""
+
+    def __init__(self, value):
+        self._value = value
+
+    def result(self):
+        return self._value
+
+def _iter_rendered(invoice_ids: List[int]) -> Iterator[tuple]:
+    """
+    Yield (filename, pdf bytes) in the order of `invoice_ids`
+
+    Invoices are loaded in batches and rendered in the process pool. Only a
+    bounded number of renders are in flight at once, so memory stays flat
+    however many invoices are exported.
+    """
+    executor = _get_executor()
+    max_in_flight = max(BATCH_SIZE, RENDER_WORKERS * 2)
+    pending = deque()  # (filename, invoice_id, version, future)
+
+    for start in range(0, len(invoice_ids), BATCH_SIZE):
+        batch_ids = invoice_ids[start:start + BATCH_SIZE]
+        db = SessionLocal()
+        try:
+            invoices = db.query(models.Invoice).options(
+                joinedload(models.Invoice.business),
+                joinedload(models.Invoice.customer),
+                joinedload(models.Invoice.items).joinedload(models.InvoiceItem.product)
+            ).filter(models.Invoice.id.in_(batch_ids)).all()
+            by_id = {invoice.id: invoice for invoice in invoices}
+
+            for invoice_id in batch_ids:
+                invoice = by_id.get(invoice_id)
+                if invoice is None:
+                    continue
+                version = invoice_pdf_version(invoice, invoice.business, invoice.customer)
+                cached = pdf_cache.get(invoice.id, version)
+                if cached is not None:
+                    future = _Done(cached)
+                else:
+                    future = executor.submit(_render_pdf, *_snapshot(invoice, invoice.business, invoice.customer))
+                pending.append((f"Invoice_{invoice.invoice_number}.pdf", invoice.id, version, future))
+        finally:
+            db.close()
+
+        while len(pending) > max_in_flight:
+            yield _collect(pending.popleft())
+
+    while pending:
+        yield _collect(pending.popleft())
+
+def _collect(entry) -> tuple:
+    filename, invoice_id, version, future = entry
+    data = future.result()
+    if not isinstance(future, _Done):
+        pdf_cache.put(invoice_id, version, data)
+    return filename, data
+
+class _ZipSink(io.RawIOBase):
+    """Unseekable write target that hands zip output back in chunks"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def stream_invoice_pdfs_zip(invoice_ids: List[int]) -> Iterator[bytes]:
+    """Render the given invoices and stream them back as a ZIP archive"""
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for filename, data in _iter_rendered(invoice_ids):
+            archive.writestr(filename, data)
+            yield sink.drain()
+    yield sink.drain()
@@ -2,7 +2,9 @@ from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import inch
+from reportlab.lib.units import inch, mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
 from io import BytesIO
 from datetime import datetime
 
@@ -194,3 +196,100 @@ def generate_invoice_pdf(invoice, business, customer=None):
     
     return pdf_buffer
 
+
+class ReceiptLayout:
+    """Fixed fonts and column positions for one thermal paper width"""
+    
+    def __init__(self, paper_width_mm):
+        self.width = paper_width_mm * mm
+        self.margin = 3 * mm
+        self.left = self.margin
+        self.right = self.width - self.margin
+        self.center = self.width / 2
+        self.font = 'Helvetica'
+        self.bold_font = 'Helvetica-Bold'
+        self.font_size = 8 if paper_width_mm >= 80 else 7
+        self.title_size = self.font_size + 3
+        self.leading = 3
+        # Approximate characters per line, assuming an average glyph of ~0.6 x 'M'
+        self.line_chars = int((self.right - self.left) / stringWidth('M', self.font, self.font_size) * 1.6)
+
+# Precomputed layouts for the supported paper widths
+RECEIPT_LAYOUTS = {80: ReceiptLayout(80), 58: ReceiptLayout(58)}
+
+def generate_receipt_pdf(invoice, business, customer=None, paper_width_mm=80):
+    """
+    Generate a thermal-printer receipt PDF
+    
+    Draws straight onto a single page sized to the content, without platypus
+    flowables, so it renders far faster than generate_invoice_pdf.
+    
+    Args:
+        invoice: Invoice model instance
+        business: Business model instance
+        customer: Customer model instance (optional)
+        paper_width_mm: Receipt paper width, 80 or 58
+    
+    Returns:
+        BytesIO object containing PDF data
+    """
+    layout = RECEIPT_LAYOUTS[paper_width_mm]
+    
+    # Each line is (text, alignment, bold, size) with alignment one of l/c/r
+    # or "rule" for a separator, or a (left text, right text) pair drawn on
+    # the same line.
+    lines = []
+    lines.append((business.business_name if business else 'Business', 'c', True, layout.title_size))
+    lines.append((f"Invoice #: {invoice.invoice_number}", 'l', False, None))
+    created = invoice.created_at.strftime('%d-%m-%Y %H:%M') if invoice.created_at else 'N/A'
+    lines.append((f"Date: {created}", 'l', False, None))
+    if customer:
+        lines.append((f"Customer: {customer.customer_name}", 'l', False, None))
+    lines.append(('', 'rule', False, None))
+    
+    for item in invoice.items:
+        name = item.product.product_name if item.product else 'Product'
+        lines.append((name[:layout.line_chars], 'l', False, None))
+        lines.append(((f"  {item.quantity:g} x {item.unit_price:.2f}", f"{item.total_amount:.2f}"), None, False, None))
+    
+    lines.append(('', 'rule', False, None))
+    lines.append((("Subtotal", f"{invoice.subtotal:.2f}"), None, False, None))
+    lines.append((("Tax", f"{invoice.tax_amount:.2f}"), None, False, None))
+    if invoice.discount_amount:
+        lines.append((("Discount", f"-{invoice.discount_amount:.2f}"), None, False, None))
+    lines.append((("TOTAL Rs.", f"{invoice.grand_total:.2f}"), None, True, layout.title_size))
+    lines.append(('', 'rule', False, None))
+    
+    payment_method = invoice.payment_method.value.upper() if invoice.payment_method else 'N/A'
+    payment_status = invoice.payment_status.value.upper() if invoice.payment_status else 'N/A'
+    lines.append((f"Paid by: {payment_method}  Status: {payment_status}", 'l', False, None))
+    lines.append(("Thank you for your business!", 'c', False, None))
+    
+    height = 2 * layout.margin + sum((size or layout.font_size) + layout.leading for _, _, _, size in lines)
+    
+    pdf_buffer = BytesIO()
+    pdf = canvas.Canvas(pdf_buffer, pagesize=(layout.width, height))
+    y = height - layout.margin
+    
+    for text, align, bold, size in lines:
+        size = size or layout.font_size
+        y -= size + layout.leading
+        pdf.setFont(layout.bold_font if bold else layout.font, size)
+        if isinstance(text, tuple):
+            pdf.drawString(layout.left, y, text[0])
+            pdf.drawRightString(layout.right, y, text[1])
+        elif align == 'rule':
+            pdf.line(layout.left, y + size / 2, layout.right, y + size / 2)
+        elif align == 'c':
+            pdf.drawCentredString(layout.center, y, text)
+        elif align == 'r':
+            pdf.drawRightString(layout.right, y, text)
+        else:
+            pdf.drawString(layout.left, y, text)
+    
+    pdf.showPage()
+    pdf.save()
+    
+    pdf_buffer.seek(0)
+    
+    return pdf_buffer
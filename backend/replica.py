@@ -0,0 +1,66 @@
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+from auth import get_current_active_user
+from cache import LRUCache
+from config import settings
+from database import ReplicaSessionLocal, SessionLocal, get_db, replica_engine
+import models
+
+# Users who committed a write within the read-your-writes window
+_recent_writers = LRUCache(
+    max_entries=settings.READ_YOUR_WRITES_MAX_USERS,
+    ttl=settings.READ_YOUR_WRITES_SECONDS
+)
+
+def _mark_statement_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+def _mark_flush_write(session, flush_context):
+    session.info["wrote"] = True
+
+def _record_writer(session):
+    # get_current_user puts the user id on the request's session
+    if session.info.pop("wrote", False) and session.info.get("user_id"):
+        _recent_writers.set(session.info["user_id"], True)
+
+def _forget_write(session):
+    session.info.pop("wrote", None)
+
+if ReplicaSessionLocal is not None:
+    event.listen(SessionLocal, "do_orm_execute", _mark_statement_write)
+    event.listen(SessionLocal, "after_flush", _mark_flush_write)
+    event.listen(SessionLocal, "after_commit", _record_writer)
+    event.listen(SessionLocal, "after_rollback", _forget_write)
+
+def read_session_factory(user_id: int) -> sessionmaker:
+    """
+    Where a user's reads should go: the replica, or the primary when no
+    replica is configured or the user wrote within READ_YOUR_WRITES_SECONDS
+
+    The window is tracked per worker process, so it only covers requests
+    served by the worker that handled the write.
+    """
+    if ReplicaSessionLocal is None or _recent_writers.get(user_id):
+        return SessionLocal
+    return ReplicaSessionLocal
+
+def is_replica_session(db: Session) -> bool:
+    """Whether `db` reads from the replica"""
+    return replica_engine is not None and db.get_bind() is replica_engine
+
+def get_read_db(
+    current_user: models.User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Session for read-only routes, on the replica when it is safe to use"""
+    if read_session_factory(current_user.id) is SessionLocal:
+        yield db
+        return
+    
+    replica = ReplicaSessionLocal()
+    try:
+        yield replica
+    finally:
+        replica.close()
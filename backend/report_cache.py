@@ -0,0 +1,75 @@
+import threading
+import time
+from typing import Callable, Hashable
+from cache import LRUCache, SingleFlight
+from config import settings
+
+_MISSING = object()
+
+class ReportCache:
+    """
+    Report results keyed by (business_id, generation, report, params)
+
+    Each business has a generation number that write paths bump after they
+    commit. Bumping makes every cached result for that business unreachable
+    at once; the stale entries then age out of the LRU. The counters live in
+    this process, so other workers only see a write once their TTL expires.
+
+    Concurrent misses for the same key share one computation. Results read
+    from a replica within `replica_lag` seconds of a bump are returned but
+    not cached, since the replica may not have the write yet.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, replica_lag: float = 0):
+        self.results = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.flights = SingleFlight()
+        self.replica_lag = replica_lag
+        self._generations = {}
+        self._bumped_at = {}
+        self._lock = threading.Lock()
+
+    def generation(self, business_id: int) -> int:
+        return self._generations.get(business_id, 0)
+
+    def bump(self, business_id: int):
+        """Invalidate every cached report of a business"""
+        if business_id is None:
+            return
+        with self._lock:
+            self._generations[business_id] = self._generations.get(business_id, 0) + 1
+            self._bumped_at[business_id] = time.monotonic()
+
+    def get_or_compute(
+        self, business_id: int, report: str, params: Hashable, compute: Callable, from_replica: bool = False
+    ):
+        key = (business_id, self.generation(business_id), report, params)
+        result = self.results.get(key, _MISSING)
+        if result is _MISSING:
+            # Primary and replica misses never share a flight, so a user
+            # reading their own writes is not handed a replica result
+            result = self.flights.do(key + (from_replica,), lambda: self._compute(key, compute, from_replica))
+        return result
+
+    def _compute(self, key, compute: Callable, from_replica: bool):
+        cacheable = not (from_replica and self._recently_bumped(key[0]))
+        result = compute()
+        if cacheable:
+            self.results.set(key, result)
+        return result
+
+    def _recently_bumped(self, business_id: int) -> bool:
+        bumped_at = self._bumped_at.get(business_id)
+        return bumped_at is not None and time.monotonic() - bumped_at < self.replica_lag
+
+    def stats(self) -> dict:
+        return {
+            **self.results.stats(),
+            "businesses_tracked": len(self._generations),
+            "coalesced": self.flights.stats(),
+        }
+
+report_cache = ReportCache(
+    max_entries=settings.REPORT_CACHE_MAX_ENTRIES,
+    ttl=settings.REPORT_CACHE_TTL_SECONDS,
+    replica_lag=settings.READ_YOUR_WRITES_SECONDS,
+)
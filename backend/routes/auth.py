@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from database import get_db
 import models
@@ -9,9 +10,12 @@ from auth import (
     get_password_hash,
     verify_password,
     create_access_token,
-    get_current_active_user
+    get_current_active_user,
+    revoke_cached_principal,
+    token_claims
 )
 from config import settings
+from tenant import lookup_business_id
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
@@ -53,9 +57,12 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Primary business goes into the token so requests can skip the lookup
+    business_id = lookup_business_id(db, user.id)
+    
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email},
+        data=token_claims(user, business_id),
         expires_delta=access_token_expires
     )
     
@@ -70,6 +77,20 @@ def get_current_user_profile(current_user: models.User = Depends(get_current_act
     """Get current user profile"""
     return current_user
 
+@router.post("/logout-all")
+def logout_all_sessions(
+    current_user: models.User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Revoke every token issued to the current user"""
+    db.query(models.User).filter(models.User.id == current_user.id).update(
+        {models.User.token_version: func.coalesce(models.User.token_version, 0) + 1},
+        synchronize_session=False
+    )
+    db.commit()
+    revoke_cached_principal(current_user.id)
+    return {"message": "Signed out of all sessions"}
+
 @router.post("/forgot-password")
 def forgot_password(email: str, db: Session = Depends(get_db)):
     """Request password reset"""
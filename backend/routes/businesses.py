@@ -5,6 +5,7 @@ from database import get_db
 import models
 from schemas import BusinessCreate, BusinessResponse, BusinessUpdate
 from auth import get_current_active_user
+from report_cache import report_cache
 
 router = APIRouter(prefix="/api/businesses", tags=["Business"])
 
@@ -70,5 +71,6 @@ def update_business(
         setattr(business, key, value)
     
     db.commit()
+    report_cache.bump(business.id)
     db.refresh(business)
     return business
@@ -1,65 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from database import get_db
 import models
 from schemas import CustomerCreate, CustomerResponse, CustomerUpdate
 from auth import get_current_active_user
+from replica import get_read_db
+from pagination import paginate, set_next_cursor
+from report_cache import report_cache
+from tenant import ensure_business_id, get_current_business_id
 
 router = APIRouter(prefix="/api/customers", tags=["Customers"])
 
-def calculate_customer_payment_status(customer_id: int, db: Session):
-    """Calculate customer's overall payment status based on all invoices"""
-    invoices = db.query(models.Invoice).filter(
-        models.Invoice.customer_id == customer_id
-    ).all()
-    
-    if not invoices:
-        return "partial"
-    
-    # Extract the value from enum and convert to lowercase for comparison
-    invoice_statuses = []
-    for inv in invoices:
-        if inv.payment_status:
-            # Get the value of the enum (e.g., "paid" from PaymentStatus.PAID)
-            status_value = inv.payment_status.value if hasattr(inv.payment_status, 'value') else str(inv.payment_status).lower()
-            invoice_statuses.append(status_value.lower())
-        else:
-            invoice_statuses.append("unpaid")
-    
-    # Check if all invoices are paid
-    if all(status == "paid" for status in invoice_statuses):
-        return "paid"
-    
-    # Check if any invoice is partial
-    if any(status == "partial" for status in invoice_statuses):
-        return "partial"
-    
-    # Otherwise unpaid
-    return "unpaid"
-
 @router.get("/", response_model=List[CustomerResponse])
 def list_customers(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(1000, le=1000),
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
     payment_status: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_active_user),
+    business_id: Optional[int] = Depends(get_current_business_id)
 ):
     """List all customers for current user's business"""
-    # Get or create user's business
-    business = db.query(models.Business).filter(models.Business.owner_id == current_user.id).first()
-    if not business:
-        business = models.Business(
-            owner_id=current_user.id,
-            business_name=f"{current_user.username}'s Business"
-        )
-        db.add(business)
-        db.commit()
-        db.refresh(business)
+    if business_id is None:
+        return []
     
-    query = db.query(models.Customer).filter(models.Customer.business_id == business.id)
+    query = db.query(models.Customer).filter(models.Customer.business_id == business_id)
     
     if search:
         query = query.filter(
@@ -67,29 +36,28 @@ def list_customers(
             (models.Customer.phone.ilike(f"%{search}%"))
         )
     
-    customers = query.offset(skip).limit(limit).all()
+    # Payment status is maintained on write, so it can be filtered in SQL
+    if payment_status:
+        try:
+            status_filter = models.PaymentStatus(payment_status.lower())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid payment status")
+        query = query.filter(models.Customer.payment_status == status_filter)
+    
+    customers = paginate(query, models.Customer, skip, limit, cursor).all()
+    set_next_cursor(response, customers, limit)
+    
+    # Get invoice numbers for the whole page in one query
+    invoice_numbers = {customer.id: [] for customer in customers}
+    if invoice_numbers:
+        rows = db.query(models.Invoice.customer_id, models.Invoice.invoice_number).filter(
+            models.Invoice.customer_id.in_(invoice_numbers)
+        ).order_by(models.Invoice.customer_id, models.Invoice.created_at.desc())
+        for customer_id, invoice_number in rows:
+            invoice_numbers[customer_id].append(invoice_number)
     
-    # Recalculate payment status for each customer and persist it
     for customer in customers:
-        calculated_status_str = calculate_customer_payment_status(customer.id, db)
-        # Convert string to enum for comparison and storage
-        calculated_status_enum = models.PaymentStatus(calculated_status_str)
-        if customer.payment_status != calculated_status_enum:
-            customer.payment_status = calculated_status_enum
-            db.add(customer)
-        
-        # Get invoice numbers for this customer
-        invoices = db.query(models.Invoice).filter(
-            models.Invoice.customer_id == customer.id
-        ).order_by(models.Invoice.created_at.desc()).all()
-        customer.invoice_numbers = [inv.invoice_number for inv in invoices]
-    
-    db.commit()
-    
-    # Apply filter after recalculation
-    if payment_status:
-        # Extract the value from enum properly for comparison
-        customers = [c for c in customers if c.payment_status.value.lower() == payment_status.lower()]
+        customer.invoice_numbers = invoice_numbers[customer.id]
     
     return customers
 
@@ -103,41 +71,26 @@ def get_customer(
     customer = db.query(models.Customer).filter(models.Customer.id == customer_id).first()
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
-    
-    # Recalculate payment status based on all invoices
-    calculated_status_str = calculate_customer_payment_status(customer.id, db)
-    calculated_status_enum = models.PaymentStatus(calculated_status_str)
-    if customer.payment_status != calculated_status_enum:
-        customer.payment_status = calculated_status_enum
-        db.add(customer)
-        db.commit()
-    
     return customer
 
 @router.post("/", response_model=CustomerResponse)
 def create_customer(
     customer: CustomerCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: models.User = Depends(get_current_active_user),
+    business_id: Optional[int] = Depends(get_current_business_id)
 ):
     """Create new customer for current user's business"""
-    # Get or create user's business
-    business = db.query(models.Business).filter(models.Business.owner_id == current_user.id).first()
-    if not business:
-        business = models.Business(
-            owner_id=current_user.id,
-            business_name=f"{current_user.username}'s Business"
-        )
-        db.add(business)
-        db.commit()
-        db.refresh(business)
+    # Create the user's default business in this transaction if they have none
+    business_id = ensure_business_id(db, current_user, business_id)
     
     db_customer = models.Customer(
         **customer.dict(),
-        business_id=business.id
+        business_id=business_id
     )
     db.add(db_customer)
     db.commit()
+    report_cache.bump(business_id)
     db.refresh(db_customer)
     return db_customer
 
@@ -158,6 +111,7 @@ def update_customer(
         setattr(customer, key, value)
     
     db.commit()
+    report_cache.bump(customer.business_id)
     db.refresh(customer)
     return customer
 
@@ -194,7 +148,7 @@ def unblock_customer(
 @router.get("/{customer_id}/invoices")
 def get_customer_invoices(
     customer_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """Get all invoices for a customer"""
@@ -1,91 +1,114 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, Header
 from fastapi.responses import StreamingResponse
+from sqlalchemy import case, func, insert, literal, update
 from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime, timedelta
 from database import get_db
 import models
-from schemas import InvoiceCreate, InvoiceResponse, InvoiceUpdate, PaymentCreate, PaymentResponse
+from schemas import (
+    InvoiceCreate, InvoiceExportRequest, InvoiceResponse, InvoiceSummaryResponse, InvoiceUpdate,
+    PaymentCreate, PaymentResponse
+)
 from auth import get_current_active_user
-from pdf_generator import generate_invoice_pdf
+from replica import get_read_db
+from pdf_generator import generate_invoice_pdf, generate_receipt_pdf
+from pdf_cache import pdf_cache, invoice_pdf_version
+from report_cache import report_cache
+from tenant import ensure_business_id, get_current_business_id
+from pdf_export import stream_invoice_pdfs_zip
+from invoice_numbering import next_invoice_number
+from pagination import paginate, set_next_cursor
+from customer_stats import invoice_balance, record_invoice_change
+from sales_rollup import record_sale
 
 router = APIRouter(prefix="/api/invoices", tags=["Invoices"])
 
-def generate_invoice_number(business_id: int, db: Session) -> str:
-    """Generate unique invoice number"""
-    latest = db.query(models.Invoice).filter(
-        models.Invoice.business_id == business_id
-    ).order_by(models.Invoice.id.desc()).first()
-    
-    if latest:
-        number = int(latest.invoice_number.split("-")[-1]) + 1
-    else:
-        number = 1
-    
+def generate_invoice_number(business_id: int, db: Session, use_block_pool: bool = True) -> str:
+    """Generate unique invoice number from the business's counter"""
+    number = next_invoice_number(business_id, db, use_block_pool)
     return f"INV-{business_id}-{number:06d}"
 
-def calculate_customer_payment_status(customer_id: int, db: Session):
-    """Calculate customer's overall payment status based on all invoices"""
-    invoices = db.query(models.Invoice).filter(
-        models.Invoice.customer_id == customer_id
-    ).all()
+def _amount_paid_for_status(status, grand_total: float, amount_paid: Optional[float]) -> float:
+    """Amount paid that matches a payment status set directly by the client"""
+    if status == models.PaymentStatus.PAID:
+        return grand_total
+    if status is None or status == models.PaymentStatus.UNPAID:
+        return 0
+    if amount_paid is None or not 0 < amount_paid < grand_total:
+        raise HTTPException(
+            status_code=400,
+            detail="A partial invoice needs an amount_paid above 0 and below the grand total"
+        )
+    return amount_paid
+
+def _get_invoice_with_items(invoice_id: int, db: Session):
+    """Load an invoice with its customer and line items (with products) in one query"""
+    return db.query(models.Invoice).options(
+        joinedload(models.Invoice.customer),
+        joinedload(models.Invoice.items).joinedload(models.InvoiceItem.product)
+    ).filter(models.Invoice.id == invoice_id).first()
+
+def _filter_invoices(query, business_id: int, customer_id=None, payment_status=None, start_date=None, end_date=None):
+    """Apply the invoice listing filters to a query"""
+    query = query.filter(models.Invoice.business_id == business_id)
     
-    if not invoices:
-        return models.PaymentStatus.UNPAID
+    if customer_id:
+        query = query.filter(models.Invoice.customer_id == customer_id)
     
-    # Convert all to string for comparison
-    invoice_statuses = [str(inv.payment_status).lower() if inv.payment_status else "unpaid" for inv in invoices]
+    if payment_status:
+        query = query.filter(models.Invoice.payment_status == payment_status)
     
-    # Check if all invoices are paid
-    if all(status == "paid" for status in invoice_statuses):
-        return models.PaymentStatus.PAID
+    if start_date:
+        start = datetime.fromisoformat(start_date)
+        query = query.filter(models.Invoice.created_at >= start)
     
-    # Check if any invoice is partial
-    if any(status == "partial" for status in invoice_statuses):
-        return models.PaymentStatus.PARTIAL
+    if end_date:
+        end = datetime.fromisoformat(end_date)
+        query = query.filter(models.Invoice.created_at <= end)
     
-    # Otherwise unpaid
-    return models.PaymentStatus.UNPAID
+    return query
 
-@router.get("/", response_model=List[InvoiceResponse])
+@router.get("/", response_model=Union[List[InvoiceResponse], List[InvoiceSummaryResponse]])
 def list_invoices(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, le=100),
+    cursor: Optional[str] = None,
     customer_id: Optional[int] = None,
     payment_status: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    view: str = Query("full", pattern="^(full|summary)$"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_active_user),
+    business_id: Optional[int] = Depends(get_current_business_id)
 ):
-    """List invoices with filters for current user's business"""
-    # Get or create user's business
-    business = db.query(models.Business).filter(models.Business.owner_id == current_user.id).first()
-    if not business:
-        # Auto-create a default business for the user
-        business = models.Business(
-            owner_id=current_user.id,
-            business_name=f"{current_user.username}'s Business"
-        )
-        db.add(business)
-        db.commit()
-        db.refresh(business)
-    
-    query = db.query(models.Invoice).filter(models.Invoice.business_id == business.id)
-    
-    if customer_id:
-        query = query.filter(models.Invoice.customer_id == customer_id)
+    """List invoices with filters for current user's business
     
-    if payment_status:
-        query = query.filter(models.Invoice.payment_status == payment_status)
+    view=summary returns only the columns the history table shows, without
+    loading line items.
+    """
+    if business_id is None:
+        return []
     
-    if start_date:
-        start = datetime.fromisoformat(start_date)
-        query = query.filter(models.Invoice.created_at >= start)
+    query = _filter_invoices(
+        db.query(models.Invoice), business_id, customer_id, payment_status, start_date, end_date
+    )
     
-    if end_date:
-        end = datetime.fromisoformat(end_date)
-        query = query.filter(models.Invoice.created_at <= end)
+    if view == "summary":
+        query = query.with_entities(
+            models.Invoice.id,
+            models.Invoice.invoice_number,
+            models.Invoice.customer_id,
+            models.Customer.customer_name,
+            models.Invoice.grand_total,
+            models.Invoice.payment_status,
+            models.Invoice.created_at
+        ).outerjoin(models.Customer, models.Invoice.customer_id == models.Customer.id)
+        invoices = paginate(query, models.Invoice, skip, limit, cursor).all()
+        set_next_cursor(response, invoices, limit)
+        return [InvoiceSummaryResponse.model_validate(row) for row in invoices]
     
     # Eagerly load customer and items with products
     query = query.options(
@@ -93,7 +116,8 @@ def list_invoices(
         joinedload(models.Invoice.items).joinedload(models.InvoiceItem.product)
     )
     
-    invoices = query.order_by(models.Invoice.created_at.desc()).offset(skip).limit(limit).all()
+    invoices = paginate(query, models.Invoice, skip, limit, cursor).all()
+    set_next_cursor(response, invoices, limit)
     return invoices
 
 @router.get("/{invoice_id}", response_model=InvoiceResponse)
@@ -103,10 +127,7 @@ def get_invoice(
     current_user: models.User = Depends(get_current_active_user)
 ):
     """Get invoice details"""
-    invoice = db.query(models.Invoice).options(
-        joinedload(models.Invoice.customer),
-        joinedload(models.Invoice.items).joinedload(models.InvoiceItem.product)
-    ).filter(models.Invoice.id == invoice_id).first()
+    invoice = _get_invoice_with_items(invoice_id, db)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     return invoice
@@ -116,35 +137,40 @@ def create_invoice(
     invoice: InvoiceCreate,
     business_id: Optional[int] = None,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: models.User = Depends(get_current_active_user),
+    current_business_id: Optional[int] = Depends(get_current_business_id)
 ):
     """Create new invoice"""
-    # Get or create user's business
+    new_business = False
     if not business_id:
-        business = db.query(models.Business).filter(models.Business.owner_id == current_user.id).first()
-        if not business:
-            business = models.Business(
-                owner_id=current_user.id,
-                business_name=f"{current_user.username}'s Business"
-            )
-            db.add(business)
-            db.commit()
-            db.refresh(business)
-        business_id = business.id
+        new_business = current_business_id is None
+        # Create the user's default business in this transaction if they have none
+        business_id = ensure_business_id(db, current_user, current_business_id)
     else:
         # Get business
         business = db.query(models.Business).filter(models.Business.id == business_id).first()
         if not business:
             raise HTTPException(status_code=404, detail="Business not found")
     
+    # Load and lock every product on the bill in a single IN query. Rows are
+    # locked in id order so concurrent invoices cannot deadlock, and the stock
+    # checks below cannot race with other sales of the same products.
+    product_ids = {item.product_id for item in invoice.items}
+    products = {
+        p.id: p for p in db.query(models.Product).filter(
+            models.Product.id.in_(product_ids)
+        ).order_by(models.Product.id).with_for_update().all()
+    }
+    
     # Calculate totals
     subtotal = 0
     tax_amount = 0
-    invoice_items = []
+    total_cost = 0
+    item_rows = []
+    stock_rows = []
     
     for item in invoice.items:
-        # Get product
-        product = db.query(models.Product).filter(models.Product.id == item.product_id).first()
+        product = products.get(item.product_id)
         if not product:
             raise HTTPException(status_code=404, detail=f"Product {item.product_id} not found")
         
@@ -158,43 +184,45 @@ def create_invoice(
         
         subtotal += item_total
         tax_amount += item_tax
+        total_cost += item.quantity * product.buying_price
         
-        # Create invoice item
-        invoice_item = models.InvoiceItem(
-            product_id=item.product_id,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-            tax_percentage=item.tax_percentage,
-            tax_amount=item_tax,
-            total_amount=item_total + item_tax
-        )
-        invoice_items.append(invoice_item)
+        item_rows.append({
+            "product_id": item.product_id,
+            "quantity": item.quantity,
+            "unit_price": item.unit_price,
+            "unit_cost": product.buying_price,
+            "tax_percentage": item.tax_percentage,
+            "tax_amount": item_tax,
+            "total_amount": item_total + item_tax,
+        })
         
         # Update product stock
+        previous_stock = product.current_stock
         product.current_stock -= item.quantity
         
-        # Create stock history
-        stock_history = models.StockHistory(
-            product_id=product.id,
-            quantity_change=-item.quantity,
-            previous_stock=product.current_stock + item.quantity,
-            new_stock=product.current_stock,
-            reason="sale",
-            notes=f"Invoice sale"
-        )
-        db.add(stock_history)
+        stock_rows.append({
+            "product_id": product.id,
+            "quantity_change": -item.quantity,
+            "previous_stock": previous_stock,
+            "new_stock": product.current_stock,
+            "reason": "sale",
+            "notes": "Invoice sale",
+        })
     
     # Calculate grand total
     grand_total = subtotal + tax_amount - invoice.discount_amount
+    amount_paid = _amount_paid_for_status(invoice.payment_status, grand_total, invoice.amount_paid)
     
-    # Generate invoice number
-    invoice_number = generate_invoice_number(business_id, db)
+    # Generate invoice number; a business created above is still uncommitted,
+    # so its first number comes from this transaction rather than the block pool
+    invoice_number = generate_invoice_number(business_id, db, use_block_pool=not new_business)
     
     # If no customer provided, create a walk-in customer
+    customer = None
     customer_id = invoice.customer_id
     if not customer_id:
         # Create a walk-in customer with invoice number as identifier
-        walk_in_customer = models.Customer(
+        customer = models.Customer(
             business_id=business_id,
             customer_name="Walk-in",
             phone="N/A",
@@ -202,9 +230,7 @@ def create_invoice(
             address=None,
             payment_status=models.PaymentStatus.UNPAID
         )
-        db.add(walk_in_customer)
-        db.flush()  # Get the ID without committing
-        customer_id = walk_in_customer.id
+        db.add(customer)
     
     # Create invoice
     db_invoice = models.Invoice(
@@ -215,32 +241,43 @@ def create_invoice(
         tax_amount=tax_amount,
         discount_amount=invoice.discount_amount,
         grand_total=grand_total,
+        amount_paid=amount_paid,
         payment_method=invoice.payment_method,
         payment_status=invoice.payment_status,
         notes=invoice.notes,
-        created_by_id=current_user.id,
-        items=invoice_items
+        created_by_id=current_user.id
     )
-    
+    if customer is not None:
+        db_invoice.customer = customer
     db.add(db_invoice)
-    db.commit()
-    db.refresh(db_invoice)
+    db.flush()  # Get the invoice ID without committing
+    
+    # Bulk insert line items and stock movements
+    for row in item_rows:
+        row["invoice_id"] = db_invoice.id
+    if item_rows:
+        db.execute(insert(models.InvoiceItem), item_rows)
+    if stock_rows:
+        db.execute(insert(models.StockHistory), stock_rows)
+    
+    # Add the sale to the business's daily rollup
+    record_sale(
+        db, business_id, db_invoice.created_at, grand_total, tax_amount, invoice.discount_amount, total_cost
+    )
     
-    # Update customer totals
-    customer = db.query(models.Customer).filter(models.Customer.id == customer_id).first()
-    if customer:
-        customer.total_purchases += grand_total
-        
-        # Update payment status based on all customer invoices
-        if invoice.payment_status == models.PaymentStatus.UNPAID:
-            customer.total_outstanding += grand_total
-        
-        # Recalculate customer's overall payment status
-        customer.payment_status = calculate_customer_payment_status(customer_id, db)
-        
-        db.commit()
+    # Update customer totals and status counters in the same transaction
+    record_invoice_change(
+        db,
+        db_invoice.customer_id,
+        new_status=db_invoice.payment_status,
+        purchases=grand_total,
+        outstanding=invoice_balance(grand_total, amount_paid)
+    )
+    
+    db.commit()
+    report_cache.bump(business_id)
     
-    return db_invoice
+    return _get_invoice_with_items(db_invoice.id, db)
 
 @router.put("/{invoice_id}", response_model=InvoiceResponse)
 def update_invoice(
@@ -250,22 +287,42 @@ def update_invoice(
     current_user: models.User = Depends(get_current_active_user)
 ):
     """Update invoice"""
-    invoice = db.query(models.Invoice).options(
-        joinedload(models.Invoice.customer),
-        joinedload(models.Invoice.items).joinedload(models.InvoiceItem.product)
-    ).filter(models.Invoice.id == invoice_id).first()
+    invoice = _get_invoice_with_items(invoice_id, db)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
+    previous_status = invoice.payment_status
+    previous_paid = invoice.amount_paid or 0
     update_data = invoice_update.dict(exclude_unset=True)
+    requested_paid = update_data.pop('amount_paid', None)
     for key, value in update_data.items():
         setattr(invoice, key, value)
     
-    # If payment_status is being updated and customer exists, recalculate customer's payment_status
-    if 'payment_status' in update_data and invoice.customer:
-        invoice.customer.payment_status = calculate_customer_payment_status(invoice.customer_id, db)
+    if 'payment_status' in update_data:
+        # Keep amount_paid in line with the status; a partial invoice keeps
+        # its current amount unless a new one is given
+        invoice.amount_paid = _amount_paid_for_status(
+            invoice.payment_status,
+            invoice.grand_total or 0,
+            requested_paid if requested_paid is not None else previous_paid
+        )
+        
+        # Move the invoice between the customer's status counters and
+        # apply the change in its balance
+        record_invoice_change(
+            db,
+            invoice.customer_id,
+            previous_status,
+            invoice.payment_status,
+            outstanding=(
+                invoice_balance(invoice.grand_total, invoice.amount_paid)
+                - invoice_balance(invoice.grand_total, previous_paid)
+            )
+        )
     
     db.commit()
+    pdf_cache.invalidate(invoice_id)
+    report_cache.bump(invoice.business_id)
     db.refresh(invoice)
     return invoice
 
@@ -277,7 +334,10 @@ def add_payment(
     current_user: models.User = Depends(get_current_active_user)
 ):
     """Add payment to invoice"""
-    invoice = db.query(models.Invoice).filter(models.Invoice.id == invoice_id).first()
+    # Lock the invoice so the status the payment moves it from is accurate
+    invoice = db.query(models.Invoice).filter(
+        models.Invoice.id == invoice_id
+    ).with_for_update().first()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
@@ -289,31 +349,34 @@ def add_payment(
         notes=payment.notes
     )
     
-    # Calculate total paid
-    total_paid = db.query(models.Payment).filter(
-        models.Payment.invoice_id == invoice_id
-    ).with_entities(models.Payment.amount).all()
-    
-    total_paid_amount = sum([p[0] for p in total_paid]) + payment.amount
-    
-    # Update payment status
-    if total_paid_amount >= invoice.grand_total:
-        invoice.payment_status = models.PaymentStatus.PAID
-    elif total_paid_amount > 0:
-        invoice.payment_status = models.PaymentStatus.PARTIAL
-    
-    # Update customer outstanding
-    if invoice.customer_id:
-        customer = db.query(models.Customer).filter(models.Customer.id == invoice.customer_id).first()
-        if customer:
-            customer.total_outstanding -= payment.amount
-            if total_paid_amount >= invoice.grand_total:
-                customer.payment_status = models.PaymentStatus.PAID
-            else:
-                customer.payment_status = models.PaymentStatus.PARTIAL
+    # Add to the running total and derive the new status in one statement
+    total_paid_amount = func.coalesce(models.Invoice.amount_paid, 0) + payment.amount
+    status_type = models.Invoice.payment_status.type
+    previous_status = invoice.payment_status
+    new_status = db.execute(
+        update(models.Invoice)
+        .where(models.Invoice.id == invoice_id)
+        .values(
+            amount_paid=total_paid_amount,
+            payment_status=case(
+                (total_paid_amount >= models.Invoice.grand_total, literal(models.PaymentStatus.PAID, status_type)),
+                (total_paid_amount > 0, literal(models.PaymentStatus.PARTIAL, status_type)),
+                else_=models.Invoice.payment_status
+            )
+        )
+        .returning(models.Invoice.payment_status)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    
+    # Update customer outstanding and status counters
+    record_invoice_change(
+        db, invoice.customer_id, previous_status, new_status, outstanding=-payment.amount
+    )
     
     db.add(db_payment)
     db.commit()
+    pdf_cache.invalidate(invoice_id)
+    report_cache.bump(invoice.business_id)
     db.refresh(db_payment)
     return db_payment
 
@@ -332,28 +395,74 @@ def get_invoice_payments(
 @router.get("/{invoice_id}/pdf")
 def download_invoice_pdf(
     invoice_id: int,
+    layout: str = Query("invoice", pattern="^(invoice|receipt-80|receipt-58)$"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    """Download invoice as PDF"""
-    invoice = db.query(models.Invoice).filter(models.Invoice.id == invoice_id).first()
+    """Download invoice as PDF, either full page or as an 80mm/58mm thermal receipt"""
+    invoice = _get_invoice_with_items(invoice_id, db)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
     # Get business and customer
     business = db.query(models.Business).filter(models.Business.id == invoice.business_id).first()
-    customer = None
-    if invoice.customer_id:
-        customer = db.query(models.Customer).filter(models.Customer.id == invoice.customer_id).first()
+    customer = invoice.customer
+    
+    version = invoice_pdf_version(invoice, business, customer, layout)
+    etag = f'"{version}"'
+    headers = {
+        "Content-Disposition": f"attachment; filename=Invoice_{invoice.invoice_number}.pdf",
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+    }
+    
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    # Serve a cached render when this version was generated before
+    pdf_bytes = pdf_cache.get(invoice.id, version)
+    if pdf_bytes is None:
+        if layout == "invoice":
+            pdf_buffer = generate_invoice_pdf(invoice, business, customer)
+        else:
+            paper_width_mm = int(layout.split("-")[1])
+            pdf_buffer = generate_receipt_pdf(invoice, business, customer, paper_width_mm)
+        pdf_bytes = pdf_buffer.getvalue()
+        pdf_cache.put(invoice.id, version, pdf_bytes)
+    
+    return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
+
+@router.post("/export/pdf")
+def export_invoice_pdfs(
+    export: InvoiceExportRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+    business_id: Optional[int] = Depends(get_current_business_id)
+):
+    """Download the PDFs of many invoices as one ZIP, streamed while rendering"""
+    if business_id is None:
+        raise HTTPException(status_code=404, detail="Business not found")
+    
+    payment_status = models.PaymentStatus(export.payment_status.value) if export.payment_status else None
+    query = _filter_invoices(
+        db.query(models.Invoice.id), business_id, export.customer_id, payment_status,
+        export.start_date, export.end_date
+    )
+    if export.invoice_ids:
+        query = query.filter(models.Invoice.id.in_(export.invoice_ids))
+    
+    invoice_ids = [row[0] for row in query.order_by(models.Invoice.created_at, models.Invoice.id).all()]
+    if not invoice_ids:
+        raise HTTPException(status_code=404, detail="No invoices match the export filter")
     
-    # Generate PDF
-    pdf_buffer = generate_invoice_pdf(invoice, business, customer)
+    # The stream loads its own batches; don't hold this connection while it runs
+    db.close()
     
-    # Return as streaming response
     return StreamingResponse(
-        pdf_buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=Invoice_{invoice.invoice_number}.pdf"}
+        stream_invoice_pdfs_zip(invoice_ids),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=Invoices_{business_id}.zip"}
     )
 
 @router.delete("/{invoice_id}")
@@ -367,12 +476,33 @@ def delete_invoice(
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
+    # Take the sale back out of the daily rollup
+    total_cost = db.query(
+        func.coalesce(func.sum(models.InvoiceItem.quantity * models.InvoiceItem.unit_cost), 0)
+    ).filter(models.InvoiceItem.invoice_id == invoice_id).scalar()
+    record_sale(
+        db, invoice.business_id, invoice.created_at, -(invoice.grand_total or 0),
+        -(invoice.tax_amount or 0), -(invoice.discount_amount or 0), -total_cost, orders=-1
+    )
+    
     # Delete related invoice items
     db.query(models.InvoiceItem).filter(models.InvoiceItem.invoice_id == invoice_id).delete()
     
+    # Drop the invoice from the customer's status counters and totals
+    record_invoice_change(
+        db,
+        invoice.customer_id,
+        old_status=invoice.payment_status,
+        purchases=-(invoice.grand_total or 0),
+        outstanding=-invoice_balance(invoice.grand_total, invoice.amount_paid)
+    )
+    
     # Delete the invoice
+    business_id = invoice.business_id
     db.delete(invoice)
     db.commit()
+    pdf_cache.invalidate(invoice_id)
+    report_cache.bump(business_id)
     
     return {"message": "Invoice deleted successfully", "invoice_id": invoice_id}
 
@@ -1,40 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from database import get_db
 import models
 from schemas import ProductCreate, ProductResponse, ProductUpdate, StockHistoryResponse
 from auth import get_current_active_user
+from replica import get_read_db
+from pagination import paginate, set_next_cursor
+from report_cache import report_cache
+from tenant import ensure_business_id, get_current_business_id
 
 router = APIRouter(prefix="/api/products", tags=["Products"])
 
 @router.get("/", response_model=List[ProductResponse])
 def list_products(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, le=100),
+    cursor: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
     min_price: Optional[float] = Query(None),
     max_price: Optional[float] = Query(None),
     low_stock: Optional[bool] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_active_user),
+    business_id: Optional[int] = Depends(get_current_business_id)
 ):
     """List all products with optional filters - optimized query"""
-    # Get or create user's business
-    business = db.query(models.Business).filter(models.Business.owner_id == current_user.id).first()
-    
-    if not business:
-        # Auto-create a default business for the user
-        business = models.Business(
-            owner_id=current_user.id,
-            business_name=f"{current_user.username}'s Business"
-        )
-        db.add(business)
-        db.commit()
-        db.refresh(business)
+    if business_id is None:
+        return []
     
-    query = db.query(models.Product).filter(models.Product.business_id == business.id)
+    query = db.query(models.Product).filter(models.Product.business_id == business_id)
     
     # Apply search filter
     if search and search.strip():
@@ -56,7 +53,8 @@ def list_products(
     if low_stock:
         query = query.filter(models.Product.current_stock <= models.Product.min_stock_level)
     
-    products = query.order_by(models.Product.created_at.desc()).offset(skip).limit(limit).all()
+    products = paginate(query, models.Product, skip, limit, cursor).all()
+    set_next_cursor(response, products, limit)
     return products
 
 @router.get("/{product_id}", response_model=ProductResponse)
@@ -75,26 +73,17 @@ def get_product(
 def create_product(
     product: ProductCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: models.User = Depends(get_current_active_user),
+    business_id: Optional[int] = Depends(get_current_business_id)
 ):
     """Create a new product"""
-    # Get or create user's business
-    business = db.query(models.Business).filter(models.Business.owner_id == current_user.id).first()
-    
-    if not business:
-        # Auto-create a default business for the user
-        business = models.Business(
-            owner_id=current_user.id,
-            business_name=f"{current_user.username}'s Business"
-        )
-        db.add(business)
-        db.commit()
-        db.refresh(business)
+    # Create the user's default business in this transaction if they have none
+    business_id = ensure_business_id(db, current_user, business_id)
     
     # Check if SKU already exists
     existing = db.query(models.Product).filter(
         models.Product.sku == product.sku,
-        models.Product.business_id == business.id
+        models.Product.business_id == business_id
     ).first()
     
     if existing:
@@ -102,10 +91,11 @@ def create_product(
     
     db_product = models.Product(
         **product.dict(),
-        business_id=business.id
+        business_id=business_id
     )
     db.add(db_product)
     db.commit()
+    report_cache.bump(business_id)
     db.refresh(db_product)
     return db_product
 
@@ -126,6 +116,7 @@ def update_product(
         setattr(product, key, value)
     
     db.commit()
+    report_cache.bump(product.business_id)
     db.refresh(product)
     return product
 
@@ -140,8 +131,10 @@ def delete_product(
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
+    business_id = product.business_id
     db.delete(product)
     db.commit()
+    report_cache.bump(business_id)
     
     return {"message": "Product deleted successfully", "product_id": product_id}
 
@@ -155,7 +148,10 @@ def add_stock(
     current_user: models.User = Depends(get_current_active_user)
 ):
     """Add stock to product"""
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
+    # Lock the row so concurrent sales and restocks cannot lose updates
+    product = db.query(models.Product).filter(
+        models.Product.id == product_id
+    ).with_for_update().first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
@@ -174,6 +170,7 @@ def add_stock(
     
     db.add(stock_history)
     db.commit()
+    report_cache.bump(product.business_id)
     db.refresh(product)
     
     return {
@@ -201,7 +198,7 @@ def get_stock_history(
 @router.get("/low-stock/{business_id}")
 def get_low_stock_products(
     business_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """Get products below minimum stock level - optimized with limit"""
@@ -1,41 +1,63 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
-from datetime import datetime, timedelta, timezone
-from database import get_db
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import io
+from database import get_db, statement_timeout
+from replica import get_read_db, is_replica_session, read_session_factory
+from config import settings
 import models
+import schemas
 from auth import get_current_active_user
-from sqlalchemy import func
+from sqlalchemy import case, func
+from sales_rollup import BUSINESS_TZ, bucket_start, local_date, next_bucket, sales_timeseries
+from report_cache import report_cache
+from tenant import get_current_business_id
 
-router = APIRouter(prefix="/api/reports", tags=["Reports"])
+router = APIRouter(
+    prefix="/api/reports",
+    tags=["Reports"],
+    dependencies=[Depends(statement_timeout(settings.REPORT_STATEMENT_TIMEOUT_MS, get_read_db))]
+)
 
-@router.get("/sales/summary")
-def get_sales_summary(
-    business_id: Optional[int] = None,
-    period: str = Query("daily", regex="^(daily|weekly|monthly|yearly)$"),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
-):
-    """Get sales summary for specified period"""
-    
-    # If no business_id provided, get the user's business
-    if not business_id:
-        business = db.query(models.Business).filter(models.Business.owner_id == current_user.id).first()
-        if not business:
-            # Create a default business for the user
-            business = models.Business(
-                owner_id=current_user.id,
-                business_name=f"{current_user.username}'s Business"
-            )
-            db.add(business)
-            db.commit()
-            db.refresh(business)
-        business_id = business.id
-    
-    # Determine date range
-    IST = timezone(timedelta(hours=5, minutes=30))
-    now = datetime.now(IST)
+# Upper bound on points returned by the time-series endpoint
+MAX_TIMESERIES_BUCKETS = 1000
+
+# Widgets served by /dashboard: (compute(db, business_id, period), empty(period) when there is no business)
+DASHBOARD_WIDGETS = {
+    "sales_summary": (
+        lambda db, business_id, period: _sales_summary(db, business_id, period),
+        lambda period: _empty_sales_summary(period)
+    ),
+    "inventory_value": (
+        lambda db, business_id, period: _inventory_value(db, business_id),
+        lambda period: {"total_items": 0, "total_stock": 0, "total_capital_value": 0, "by_category": []}
+    ),
+    "bestsellers": (
+        lambda db, business_id, period: _bestsellers(db, business_id, "monthly", 5),
+        lambda period: {"period": "monthly", "bestsellers": []}
+    ),
+    "top_customers": (
+        lambda db, business_id, period: _top_customers(db, business_id, 5),
+        lambda period: {"top_customers": []}
+    ),
+    "low_stock": (
+        lambda db, business_id, period: _low_stock(db, business_id, 5),
+        lambda period: []
+    ),
+}
 
+# Runs dashboard widgets side by side for all requests; each running widget
+# holds one connection, so this also caps the connections dashboards use
+_dashboard_executor = ThreadPoolExecutor(max_workers=settings.DASHBOARD_WORKERS, thread_name_prefix="dashboard")
+
+def _period_range(period: str):
+    """Start and end of the current calendar period in the business timezone"""
+    now = datetime.now(BUSINESS_TZ)
+    
     if period == "daily":
         start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
         end_date = start_date + timedelta(days=1)
@@ -53,21 +75,35 @@ def get_sales_summary(
         start_date = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
         end_date = start_date.replace(year=now.year + 1)
     
-    # Get invoices for period
-    invoices = db.query(models.Invoice).filter(
-        models.Invoice.business_id == business_id,
-        models.Invoice.created_at >= start_date,
-        models.Invoice.created_at < end_date
-    ).all()
-    
-    total_revenue = sum([inv.grand_total for inv in invoices])
-    total_orders = len(invoices)
+    return start_date, end_date
+
+def _empty_sales_summary(period: str):
+    """Sales summary for a user who has no business yet"""
+    start_date, end_date = _period_range(period)
+    return {
+        "period": period,
+        "start_date": start_date,
+        "end_date": end_date,
+        "total_revenue": 0,
+        "total_orders": 0,
+        "total_profit": 0,
+        "average_order_value": 0
+    }
+
+def _sales_summary(db: Session, business_id: int, period: str):
+    start_date, end_date = _period_range(period)
     
-    # Calculate profit
-    total_cost = 0
-    for invoice in invoices:
-        for item in invoice.items:
-            total_cost += item.quantity * item.product.buying_price
+    # Read the pre-aggregated daily rows for the period
+    rollup = models.DailySalesRollup
+    total_revenue, total_orders, total_cost = db.query(
+        func.coalesce(func.sum(rollup.revenue), 0),
+        func.coalesce(func.sum(rollup.order_count), 0),
+        func.coalesce(func.sum(rollup.cost), 0)
+    ).filter(
+        rollup.business_id == business_id,
+        rollup.local_date >= start_date.date(),
+        rollup.local_date < end_date.date()
+    ).one()
     
     total_profit = total_revenue - total_cost
     
@@ -81,53 +117,47 @@ def get_sales_summary(
         "average_order_value": total_revenue / total_orders if total_orders > 0 else 0
     }
 
-@router.get("/inventory/value")
-def get_inventory_value(
-    business_id: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
-):
-    """Get total inventory value"""
-    
-    # If no business_id provided, get the user's business
-    if not business_id:
-        business = db.query(models.Business).filter(models.Business.owner_id == current_user.id).first()
-        if not business:
-            return {"total_items": 0, "total_stock": 0, "total_capital_value": 0}
-        business_id = business.id
-    
-    products = db.query(models.Product).filter(
+def _inventory_value(db: Session, business_id: int, include_low_stock: bool = False):
+    # Per-category totals in one aggregate; the overall figures are their sums
+    columns = [
+        models.Product.category,
+        func.count(models.Product.id),
+        func.coalesce(func.sum(models.Product.current_stock), 0),
+        func.coalesce(func.sum(models.Product.current_stock * models.Product.buying_price), 0)
+    ]
+    if include_low_stock:
+        columns.append(func.coalesce(func.sum(
+            case((models.Product.current_stock <= models.Product.min_stock_level, 1), else_=0)
+        ), 0))
+    rows = db.query(*columns).filter(
         models.Product.business_id == business_id
-    ).all()
+    ).group_by(models.Product.category).order_by(models.Product.category).all()
     
-    total_value = sum([product.current_stock * product.buying_price for product in products])
+    by_category = []
+    for row in rows:
+        category = {
+            "category": row[0] or "Uncategorized",
+            "total_items": row[1],
+            "total_stock": int(row[2]),
+            "total_capital_value": float(row[3])
+        }
+        if include_low_stock:
+            category["low_stock_count"] = int(row[4])
+        by_category.append(category)
     
-    return {
-        "total_items": len(products),
-        "total_stock": sum([p.current_stock for p in products]),
-        "total_capital_value": float(total_value)
+    result = {
+        "total_items": sum(c["total_items"] for c in by_category),
+        "total_stock": sum(c["total_stock"] for c in by_category),
+        "total_capital_value": float(sum(c["total_capital_value"] for c in by_category)),
+        "by_category": by_category
     }
+    if include_low_stock:
+        result["low_stock_count"] = sum(c["low_stock_count"] for c in by_category)
+    return result
 
-@router.get("/products/bestsellers")
-def get_bestsellers(
-    business_id: Optional[int] = None,
-    limit: int = Query(10, le=100),
-    period: str = Query("monthly", regex="^(daily|weekly|monthly|yearly)$"),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
-):
-    """Get bestselling products"""
-    
-    # If no business_id provided, get the user's business
-    if not business_id:
-        business = db.query(models.Business).filter(models.Business.owner_id == current_user.id).first()
-        if not business:
-            return {"period": period, "bestsellers": []}
-        business_id = business.id
-    
+def _bestsellers(db: Session, business_id: int, period: str, limit: int):
     # Determine date range
-    IST = timezone(timedelta(hours=5, minutes=30))
-    now = datetime.now(IST)
+    now = datetime.now(BUSINESS_TZ)
     if period == "daily":
         start_date = now - timedelta(days=1)
     elif period == "weekly":
@@ -137,47 +167,43 @@ def get_bestsellers(
     else:  # yearly
         start_date = now - timedelta(days=365)
     
-    # Get top selling products
-    results = db.query(
-        models.Product,
+    # Aggregate sold lines per product, then join only the top rows to products for names
+    sales = db.query(
+        models.InvoiceItem.product_id.label("product_id"),
         func.sum(models.InvoiceItem.quantity).label("total_quantity"),
-        func.sum(models.InvoiceItem.total_amount).label("total_sales")
-    ).join(models.InvoiceItem).join(models.Invoice).filter(
-        models.Product.business_id == business_id,
+        func.sum(models.InvoiceItem.total_amount).label("total_sales"),
+        func.sum(
+            models.InvoiceItem.quantity * (models.InvoiceItem.unit_price - models.InvoiceItem.unit_cost)
+        ).label("total_profit")
+    ).join(models.Invoice).filter(
+        models.Invoice.business_id == business_id,
         models.Invoice.created_at >= start_date
-    ).group_by(models.Product.id).order_by(
+    ).group_by(models.InvoiceItem.product_id).order_by(
         func.sum(models.InvoiceItem.quantity).desc()
-    ).limit(limit).all()
+    ).limit(limit).subquery()
+    
+    results = db.query(
+        models.Product.product_name,
+        sales
+    ).join(sales, models.Product.id == sales.c.product_id).order_by(
+        sales.c.total_quantity.desc()
+    ).all()
     
     return {
         "period": period,
         "bestsellers": [
             {
-                "product_id": r[0].id,
-                "product_name": r[0].product_name,
-                "quantity_sold": r[1] or 0,
-                "total_sales": float(r[2] or 0)
+                "product_id": r.product_id,
+                "product_name": r.product_name,
+                "quantity_sold": r.total_quantity or 0,
+                "total_sales": float(r.total_sales or 0),
+                "total_profit": float(r.total_profit or 0)
             }
             for r in results
         ]
     }
 
-@router.get("/customers/top")
-def get_top_customers(
-    business_id: Optional[int] = None,
-    limit: int = Query(10, le=50),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
-):
-    """Get top customers by purchases"""
-    
-    # If no business_id provided, get the user's business
-    if not business_id:
-        business = db.query(models.Business).filter(models.Business.owner_id == current_user.id).first()
-        if not business:
-            return {"top_customers": []}
-        business_id = business.id
-    
+def _top_customers(db: Session, business_id: int, limit: int):
     customers = db.query(models.Customer).filter(
         models.Customer.business_id == business_id
     ).order_by(models.Customer.total_purchases.desc()).limit(limit).all()
@@ -195,14 +221,24 @@ def get_top_customers(
         ]
     }
 
-@router.get("/payments/outstanding")
-def get_outstanding_payments(
-    business_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
-):
-    """Get all outstanding payments"""
-    invoices = db.query(models.Invoice).filter(
+def _low_stock(db: Session, business_id: int, limit: int):
+    products = db.query(models.Product).filter(
+        models.Product.business_id == business_id,
+        models.Product.current_stock <= models.Product.min_stock_level
+    ).order_by(models.Product.current_stock).limit(limit).all()
+    
+    return [schemas.ProductResponse.model_validate(p) for p in products]
+
+def _outstanding_payments(db: Session, business_id: int):
+    # Balances are maintained on the invoice rows, so no payments are loaded
+    invoices = db.query(
+        models.Invoice.id,
+        models.Invoice.invoice_number,
+        models.Invoice.grand_total,
+        models.Invoice.balance_due,
+        models.Invoice.payment_status,
+        models.Customer.customer_name
+    ).outerjoin(models.Customer, models.Invoice.customer_id == models.Customer.id).filter(
         models.Invoice.business_id == business_id,
         models.Invoice.payment_status != models.PaymentStatus.PAID
     ).all()
@@ -210,14 +246,13 @@ def get_outstanding_payments(
     total_outstanding = 0
     invoice_list = []
     for inv in invoices:
-        outstanding = inv.grand_total - sum([p.amount for p in inv.payments])
-        total_outstanding += outstanding
+        total_outstanding += inv.balance_due
         invoice_list.append({
             "invoice_id": inv.id,
             "invoice_number": inv.invoice_number,
-            "customer_name": inv.customer.customer_name if inv.customer else "Unknown",
+            "customer_name": inv.customer_name or "Unknown",
             "amount": inv.grand_total,
-            "outstanding": outstanding,
+            "outstanding": inv.balance_due,
             "payment_status": str(inv.payment_status)
         })
     
@@ -227,34 +262,335 @@ def get_outstanding_payments(
         "invoices": invoice_list
     }
 
-@router.get("/tax/summary")
-def get_tax_summary(
-    business_id: int,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+def _tax_filters(business_id: int, start_date: Optional[datetime], end_date: Optional[datetime]):
+    filters = [models.Invoice.business_id == business_id]
+    if start_date:
+        filters.append(models.Invoice.created_at >= start_date)
+    if end_date:
+        filters.append(models.Invoice.created_at <= end_date)
+    return filters
+
+def _gst_split(tax):
+    # Every supply is treated as intra-state: the line's tax is split equally
+    # between CGST and SGST, and IGST is zero (no place-of-supply is recorded)
+    return tax / 2, tax / 2, 0
+
+def _tax_summary(db: Session, business_id: int, start_date: Optional[datetime], end_date: Optional[datetime]):
+    filters = _tax_filters(business_id, start_date, end_date)
+    
+    # Taxable value and tax per GST rate, using the rate stored on each line
+    rates = db.query(
+        models.InvoiceItem.tax_percentage,
+        func.coalesce(func.sum(models.InvoiceItem.quantity * models.InvoiceItem.unit_price), 0),
+        func.coalesce(func.sum(models.InvoiceItem.tax_amount), 0),
+        func.count(models.InvoiceItem.id)
+    ).join(models.Invoice).filter(*filters).group_by(
+        models.InvoiceItem.tax_percentage
+    ).order_by(models.InvoiceItem.tax_percentage).all()
+    
+    number_of_invoices = db.query(func.count(models.Invoice.id)).filter(*filters).scalar()
+    
+    by_rate = []
+    for tax_percentage, taxable_value, tax, line_count in rates:
+        cgst, sgst, igst = _gst_split(tax)
+        by_rate.append({
+            "tax_percentage": tax_percentage or 0,
+            "taxable_value": round(taxable_value, 2),
+            "cgst": round(cgst, 2),
+            "sgst": round(sgst, 2),
+            "igst": round(igst, 2),
+            "total_tax": round(tax, 2),
+            "line_count": line_count
+        })
+    
+    return {
+        "total_tax_collected": round(sum(r["total_tax"] for r in by_rate), 2),
+        "cgst": round(sum(r["cgst"] for r in by_rate), 2),
+        "sgst": round(sum(r["sgst"] for r in by_rate), 2),
+        "igst": round(sum(r["igst"] for r in by_rate), 2),
+        "number_of_invoices": number_of_invoices,
+        "by_rate": by_rate
+    }
+
+TAX_CSV_COLUMNS = [
+    "Invoice Number", "Invoice Date", "Customer", "Place Of Supply", "Rate",
+    "Taxable Value", "CGST", "SGST", "IGST", "Total Tax"
+]
+
+def _tax_csv_rows(db: Session, business_id: int, start_date: Optional[datetime], end_date: Optional[datetime]):
+    """Yield CSV text: one row per invoice and GST rate, oldest invoice first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(TAX_CSV_COLUMNS)
+    
+    rows = db.query(
+        models.Invoice.invoice_number,
+        models.Invoice.created_at,
+        models.Customer.customer_name,
+        models.Customer.state,
+        models.InvoiceItem.tax_percentage,
+        func.sum(models.InvoiceItem.quantity * models.InvoiceItem.unit_price),
+        func.sum(models.InvoiceItem.tax_amount)
+    ).select_from(models.InvoiceItem).join(models.Invoice).outerjoin(
+        models.Customer, models.Invoice.customer_id == models.Customer.id
+    ).filter(*_tax_filters(business_id, start_date, end_date)).group_by(
+        models.Invoice.id,
+        models.Invoice.invoice_number,
+        models.Invoice.created_at,
+        models.Customer.customer_name,
+        models.Customer.state,
+        models.InvoiceItem.tax_percentage
+    ).order_by(models.Invoice.created_at, models.Invoice.id, models.InvoiceItem.tax_percentage)
+    
+    for number, created_at, customer_name, state, rate, taxable_value, tax in rows.yield_per(1000):
+        cgst, sgst, igst = _gst_split(tax or 0)
+        writer.writerow([
+            number, local_date(created_at).isoformat(), customer_name or "", state or "", rate or 0,
+            round(taxable_value or 0, 2), round(cgst, 2), round(sgst, 2), round(igst, 2), round(tax or 0, 2)
+        ])
+        if buffer.tell() >= 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    yield buffer.getvalue()
+
+def _cached(db: Session, business_id: int, report: str, params, compute):
+    """Serve a report from the cache, computing it with `db` on a miss"""
+    return report_cache.get_or_compute(
+        business_id, report, params, compute, from_replica=is_replica_session(db)
+    )
+
+@router.get("/sales/summary")
+def get_sales_summary(
+    business_id: Optional[int] = None,
+    period: str = Query("daily", regex="^(daily|weekly|monthly|yearly)$"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_active_user),
+    current_business_id: Optional[int] = Depends(get_current_business_id)
 ):
-    """Get tax collection summary"""
+    """Get sales summary for specified period"""
     
-    query = db.query(models.Invoice).filter(models.Invoice.business_id == business_id)
+    # If no business_id provided, use the user's business
+    if not business_id:
+        business_id = current_business_id
+        if business_id is None:
+            return _empty_sales_summary(period)
     
-    if start_date:
-        start = datetime.fromisoformat(start_date)
-        query = query.filter(models.Invoice.created_at >= start)
+    # The local date is part of the key so the daily summary rolls over at midnight
+    today = datetime.now(BUSINESS_TZ).date()
+    return _cached(
+        db, business_id, "sales_summary", (period, today), lambda: _sales_summary(db, business_id, period)
+    )
+
+def _run_widget(name: str, business_id: int, period: str, session_factory):
+    # Sessions are not thread-safe, so concurrent widgets cannot share the request's session
+    db = session_factory()
+    db.info["statement_timeout_ms"] = settings.REPORT_STATEMENT_TIMEOUT_MS
+    try:
+        compute, _ = DASHBOARD_WIDGETS[name]
+        today = datetime.now(BUSINESS_TZ).date()
+        return _cached(
+            db, business_id, f"dashboard:{name}", (period, today), lambda: compute(db, business_id, period)
+        )
+    finally:
+        db.close()
+
+@router.get("/dashboard")
+def get_dashboard(
+    business_id: Optional[int] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated widget names; all widgets when omitted"),
+    period: str = Query("daily", pattern="^(daily|weekly|monthly|yearly)$"),
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+    current_business_id: Optional[int] = Depends(get_current_business_id)
+):
+    """Get several dashboard widgets in one request"""
     
-    if end_date:
-        end = datetime.fromisoformat(end_date)
-        query = query.filter(models.Invoice.created_at <= end)
+    names = list(DASHBOARD_WIDGETS)
+    if fields:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in DASHBOARD_WIDGETS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown dashboard fields: {', '.join(unknown)}")
     
-    invoices = query.all()
+    # If no business_id provided, use the user's business
+    if not business_id:
+        business_id = current_business_id
+        if business_id is None:
+            return {name: DASHBOARD_WIDGETS[name][1](period) for name in names}
     
-    total_tax = sum([inv.tax_amount for inv in invoices])
-    business = db.query(models.Business).filter(models.Business.id == business_id).first()
+    # Give back the connections auth and tenant lookups used, so a waiting
+    # request holds none while its widgets each check one out
+    db.close()
+    primary_db.close()
+    
+    session_factory = read_session_factory(current_user.id)
+    futures = {
+        name: _dashboard_executor.submit(_run_widget, name, business_id, period, session_factory)
+        for name in names
+    }
+    return {name: future.result() for name, future in futures.items()}
+
+@router.get("/sales/timeseries")
+def get_sales_timeseries(
+    business_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    bucket: str = Query("day", pattern="^(day|week|month)$"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_active_user),
+    current_business_id: Optional[int] = Depends(get_current_business_id)
+):
+    """Get revenue, orders and profit per day, week or month over a date range"""
+    
+    # Default to the last 30 days, inclusive of today
+    if not end_date:
+        end_date = datetime.now(BUSINESS_TZ).date()
+    if not start_date:
+        start_date = end_date - timedelta(days=29)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    
+    bucket_count = 0
+    period_start = bucket_start(start_date, bucket)
+    while period_start <= end_date:
+        bucket_count += 1
+        if bucket_count > MAX_TIMESERIES_BUCKETS:
+            raise HTTPException(status_code=400, detail="Date range has too many buckets")
+        period_start = next_bucket(period_start, bucket)
+    
+    # If no business_id provided, use the user's business
+    if not business_id:
+        business_id = current_business_id
+        if business_id is None:
+            return {"bucket": bucket, "start_date": start_date, "end_date": end_date, "series": []}
+    
+    rows = _cached(
+        db, business_id, "sales_timeseries", (start_date, end_date, bucket),
+        lambda: sales_timeseries(db, business_id, start_date, end_date, bucket)
+    )
     
     return {
-        "total_tax_collected": total_tax,
-        "cgst": total_tax * (business.cgst_rate / (business.cgst_rate + business.sgst_rate)) if business.cgst_rate + business.sgst_rate > 0 else 0,
-        "sgst": total_tax * (business.sgst_rate / (business.cgst_rate + business.sgst_rate)) if business.cgst_rate + business.sgst_rate > 0 else 0,
-        "number_of_invoices": len(invoices)
+        "bucket": bucket,
+        "start_date": start_date,
+        "end_date": end_date,
+        "series": [
+            {
+                "period_start": period_start,
+                "revenue": float(revenue),
+                "orders": int(orders),
+                "profit": float(revenue - cost)
+            }
+            for period_start, revenue, orders, cost in rows
+        ]
     }
+
+@router.get("/inventory/value")
+def get_inventory_value(
+    business_id: Optional[int] = None,
+    include_low_stock: bool = False,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_active_user),
+    current_business_id: Optional[int] = Depends(get_current_business_id)
+):
+    """Get total inventory value"""
+    
+    # If no business_id provided, use the user's business
+    if not business_id:
+        business_id = current_business_id
+        if business_id is None:
+            return {"total_items": 0, "total_stock": 0, "total_capital_value": 0, "by_category": []}
+    
+    return _cached(
+        db, business_id, "inventory_value", (include_low_stock,),
+        lambda: _inventory_value(db, business_id, include_low_stock)
+    )
+
+@router.get("/products/bestsellers")
+def get_bestsellers(
+    business_id: Optional[int] = None,
+    limit: int = Query(10, le=100),
+    period: str = Query("monthly", regex="^(daily|weekly|monthly|yearly)$"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_active_user),
+    current_business_id: Optional[int] = Depends(get_current_business_id)
+):
+    """Get bestselling products"""
+    
+    # If no business_id provided, use the user's business
+    if not business_id:
+        business_id = current_business_id
+        if business_id is None:
+            return {"period": period, "bestsellers": []}
+    
+    return _cached(
+        db, business_id, "bestsellers", (period, limit), lambda: _bestsellers(db, business_id, period, limit)
+    )
+
+@router.get("/customers/top")
+def get_top_customers(
+    business_id: Optional[int] = None,
+    limit: int = Query(10, le=50),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_active_user),
+    current_business_id: Optional[int] = Depends(get_current_business_id)
+):
+    """Get top customers by purchases"""
+    
+    # If no business_id provided, use the user's business
+    if not business_id:
+        business_id = current_business_id
+        if business_id is None:
+            return {"top_customers": []}
+    
+    return _cached(
+        db, business_id, "top_customers", (limit,), lambda: _top_customers(db, business_id, limit)
+    )
+
+@router.get("/payments/outstanding")
+def get_outstanding_payments(
+    business_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """Get all outstanding payments"""
+    return _cached(
+        db, business_id, "outstanding_payments", (), lambda: _outstanding_payments(db, business_id)
+    )
+
+@router.get("/tax/summary")
+def get_tax_summary(
+    business_id: int,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|csv)$"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """Get GST collection summary by rate, or rate-wise invoice lines as CSV"""
+    try:
+        start = datetime.fromisoformat(start_date) if start_date else None
+        end = datetime.fromisoformat(end_date) if end_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in ISO format")
+    
+    if format == "csv":
+        return StreamingResponse(
+            _tax_csv_rows(db, business_id, start, end),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename=gst_summary_{business_id}.csv"}
+        )
+    
+    return _cached(
+        db, business_id, "tax_summary", (start, end),
+        lambda: _tax_summary(db, business_id, start, end)
+    )
+
+@router.get("/cache/stats")
+def get_report_cache_stats(
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """Get report cache hit/miss counters"""
+    return report_cache.stats()
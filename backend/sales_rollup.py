@@ -0,0 +1,161 @@
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import DateTime, Interval, and_, cast, func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from config import settings
+import models
+
+BUSINESS_TZ = ZoneInfo(settings.BUSINESS_TIMEZONE)
+
+def local_date(created_at: datetime) -> date:
+    """Business-local calendar date of a naive UTC timestamp"""
+    return created_at.replace(tzinfo=timezone.utc).astimezone(BUSINESS_TZ).date()
+
+def record_sale(
+    db: Session,
+    business_id: int,
+    created_at: datetime,
+    revenue: float,
+    tax: float,
+    discount: float,
+    cost: float,
+    orders: int = 1,
+):
+    """
+    Add one invoice's totals to its day's rollup row
+
+    Runs in the caller's transaction; pass negated amounts and orders=-1 to
+    take a deleted invoice back out.
+    """
+    day = local_date(created_at)
+    rollup = models.DailySalesRollup
+    increment = (
+        update(rollup)
+        .where(rollup.business_id == business_id, rollup.local_date == day)
+        .values(
+            revenue=rollup.revenue + revenue,
+            tax=rollup.tax + tax,
+            discount=rollup.discount + discount,
+            cost=rollup.cost + cost,
+            order_count=rollup.order_count + orders,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(increment).rowcount:
+        return
+
+    # First sale of the day for this business
+    try:
+        with db.begin_nested():
+            db.execute(insert(rollup).values(
+                business_id=business_id,
+                local_date=day,
+                revenue=revenue,
+                tax=tax,
+                discount=discount,
+                cost=cost,
+                order_count=orders,
+            ))
+    except IntegrityError:
+        # Another transaction created the row first
+        db.execute(increment)
+
+def rebuild_rollup(db: Session, business_id: int = None):
+    """Recompute the rollup rows from invoices, replacing the existing ones"""
+    cost = select(
+        func.coalesce(func.sum(models.InvoiceItem.quantity * models.InvoiceItem.unit_cost), 0)
+    ).where(models.InvoiceItem.invoice_id == models.Invoice.id).scalar_subquery()
+    invoices = db.query(
+        models.Invoice.business_id,
+        models.Invoice.created_at,
+        models.Invoice.grand_total,
+        models.Invoice.tax_amount,
+        models.Invoice.discount_amount,
+        cost
+    )
+    existing = db.query(models.DailySalesRollup)
+    if business_id:
+        invoices = invoices.filter(models.Invoice.business_id == business_id)
+        existing = existing.filter(models.DailySalesRollup.business_id == business_id)
+
+    totals = {}
+    for row in invoices.yield_per(1000):
+        key = (row.business_id, local_date(row.created_at))
+        day = totals.setdefault(key, {"revenue": 0, "tax": 0, "discount": 0, "cost": 0, "order_count": 0})
+        day["revenue"] += row.grand_total or 0
+        day["tax"] += row.tax_amount or 0
+        day["discount"] += row.discount_amount or 0
+        day["cost"] += row[5] or 0
+        day["order_count"] += 1
+
+    existing.delete(synchronize_session=False)
+    if totals:
+        db.execute(insert(models.DailySalesRollup), [
+            {"business_id": key[0], "local_date": key[1], **values}
+            for key, values in totals.items()
+        ])
+
+def bucket_start(day: date, bucket: str) -> date:
+    """First day of the day/week/month bucket containing `day` (weeks start on Monday)"""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+def next_bucket(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day + timedelta(days=7)
+    if bucket == "month":
+        return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+    return day + timedelta(days=1)
+
+def sales_timeseries(db: Session, business_id: int, start: date, end: date, bucket: str):
+    """
+    Revenue, orders and cost per bucket from `start` to `end` inclusive
+
+    Rollup dates are already business-local, so buckets need no further
+    timezone conversion. Every bucket in the range is returned, with zeros
+    where nothing was sold.
+    """
+    rollup = models.DailySalesRollup
+    in_range = (
+        rollup.business_id == business_id,
+        rollup.local_date >= start,
+        rollup.local_date <= end,
+    )
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Gap-filled series and aggregate in one statement
+        series = func.generate_series(
+            func.date_trunc(bucket, cast(start, DateTime)),
+            cast(end, DateTime),
+            cast(literal(f"1 {bucket}"), Interval)
+        ).table_valued("period_start").render_derived()
+        rows = db.query(
+            series.c.period_start,
+            func.coalesce(func.sum(rollup.revenue), 0),
+            func.coalesce(func.sum(rollup.order_count), 0),
+            func.coalesce(func.sum(rollup.cost), 0)
+        ).select_from(series).outerjoin(rollup, and_(
+            *in_range,
+            func.date_trunc(bucket, cast(rollup.local_date, DateTime)) == series.c.period_start
+        )).group_by(series.c.period_start).order_by(series.c.period_start).all()
+        return [(period_start.date(), revenue, orders, cost) for period_start, revenue, orders, cost in rows]
+
+    # Other databases: read the daily rows and bucket them here
+    totals = {}
+    for day, revenue, orders, cost in db.query(
+        rollup.local_date, rollup.revenue, rollup.order_count, rollup.cost
+    ).filter(*in_range):
+        key = bucket_start(day, bucket)
+        current = totals.get(key, (0, 0, 0))
+        totals[key] = (current[0] + revenue, current[1] + orders, current[2] + cost)
+
+    series = []
+    period_start = bucket_start(start, bucket)
+    while period_start <= end:
+        series.append((period_start, *totals.get(period_start, (0, 0, 0))))
+        period_start = next_bucket(period_start, bucket)
+    return series
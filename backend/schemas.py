@@ -187,10 +187,12 @@ class InvoiceCreate(BaseModel):
     discount_amount: float = 0
     payment_method: PaymentMethod
     payment_status: Optional[PaymentStatus] = PaymentStatus.UNPAID
+    amount_paid: Optional[float] = None  # Required when payment_status is partial
     notes: Optional[str] = None
 
 class InvoiceUpdate(BaseModel):
     payment_status: Optional[PaymentStatus] = None
+    amount_paid: Optional[float] = None  # Used when payment_status is set to partial
     notes: Optional[str] = None
 
 class InvoiceResponse(BaseModel):
@@ -202,6 +204,8 @@ class InvoiceResponse(BaseModel):
     tax_amount: float
     discount_amount: float
     grand_total: float
+    amount_paid: float = 0
+    balance_due: float = 0
     payment_method: PaymentMethod
     payment_status: PaymentStatus
     items: List[InvoiceItemResponse]
@@ -211,6 +215,25 @@ class InvoiceResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class InvoiceSummaryResponse(BaseModel):
+    id: int
+    invoice_number: str
+    customer_id: Optional[int]
+    customer_name: Optional[str] = None
+    grand_total: float
+    payment_status: PaymentStatus
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class InvoiceExportRequest(BaseModel):
+    invoice_ids: Optional[List[int]] = None
+    customer_id: Optional[int] = None
+    payment_status: Optional[PaymentStatus] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+
 # Payment Schemas
 class PaymentCreate(BaseModel):
     amount: float
@@ -237,6 +260,9 @@ class TokenResponse(BaseModel):
 class TokenData(BaseModel):
     email: Optional[str] = None
     user_id: Optional[int] = None
+    role: Optional[str] = None
+    business_id: Optional[int] = None
+    token_version: int = 0
 
 # Update forward references for circular dependencies
 InvoiceItemResponse.model_rebuild()
@@ -0,0 +1,61 @@
+from typing import Optional
+from fastapi import Depends
+from sqlalchemy.orm import Session
+from auth import get_current_active_user, get_token_data
+from cache import LRUCache
+from config import settings
+from database import get_db
+import models
+from schemas import TokenData
+
+# Owner user id -> id of their primary (lowest id) business
+business_id_cache = LRUCache(
+    max_entries=settings.TENANT_CACHE_MAX_ENTRIES,
+    ttl=settings.TENANT_CACHE_TTL_SECONDS
+)
+
+def lookup_business_id(db: Session, user_id: int) -> Optional[int]:
+    """Primary business of a user, from the cache or one indexed query"""
+    business_id = business_id_cache.get(user_id)
+    if business_id is not None:
+        return business_id
+    
+    row = db.query(models.Business.id).filter(
+        models.Business.owner_id == user_id
+    ).order_by(models.Business.id).first()
+    if row is None:
+        return None
+    business_id_cache.set(user_id, row.id)
+    return row.id
+
+def get_current_business_id(
+    token_data: TokenData = Depends(get_token_data),
+    current_user: models.User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> Optional[int]:
+    """
+    Business the request acts on, resolved once per request
+
+    Uses the token's business claim when present, otherwise the cached
+    owner lookup. None means the user has no business yet; read routes
+    should answer with empty results rather than create one.
+    """
+    if token_data.business_id is not None:
+        return token_data.business_id
+    return lookup_business_id(db, current_user.id)
+
+def ensure_business_id(db: Session, current_user: models.User, business_id: Optional[int]) -> int:
+    """
+    For write routes: return `business_id`, or create the user's default
+    business in the caller's transaction (flushed, committed with the write)
+    """
+    if business_id is not None:
+        return business_id
+    
+    business = models.Business(
+        owner_id=current_user.id,
+        business_name=f"{current_user.username}'s Business"
+    )
+    db.add(business)
+    db.flush()
+    return business.id
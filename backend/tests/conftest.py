@@ -0,0 +1,123 @@
+import os
+import sys
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+# Point the app at a throwaway database before anything imports config.
+# Set TEST_DATABASE_URL to run the suite against PostgreSQL instead.
+_tmp_dir = tempfile.mkdtemp(prefix="invoice_tests_")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{_tmp_dir}/test.db")
+os.environ["PDF_CACHE_DIR"] = os.path.join(_tmp_dir, "pdf_cache")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+import main
+import models
+from database import SessionLocal, engine
+
+# Concurrency tests need transactions that really overlap and row locks
+# that really block, so they only run against PostgreSQL
+requires_row_locks = pytest.mark.skipif(
+    engine.dialect.name != "postgresql", reason="needs PostgreSQL row locks (set TEST_DATABASE_URL)"
+)
+
+@pytest.fixture(scope="session")
+def client():
+    return TestClient(main.app)
+
+@pytest.fixture
+def headers(client):
+    """Auth headers for a new user, so every test gets its own business"""
+    return signup(client)
+
+def signup(client) -> dict:
+    name = uuid.uuid4().hex[:12]
+    response = client.post("/api/auth/signup", json={
+        "email": f"{name}@example.com",
+        "username": name,
+        "full_name": name,
+        "password": "secret1",
+    })
+    assert response.status_code == 200, response.text
+    response = client.post("/api/auth/login", data={"username": f"{name}@example.com", "password": "secret1"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def create_product(client, headers, stock: int = 100, price: float = 10, **fields) -> int:
+    name = uuid.uuid4().hex[:8]
+    response = client.post("/api/products/", json={
+        "product_name": f"Product {name}",
+        "sku": name,
+        "unit": "pc",
+        "buying_price": price / 2,
+        "selling_price": price,
+        "current_stock": stock,
+        **fields,
+    }, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+def create_customer(client, headers, name: str = "Customer") -> int:
+    response = client.post("/api/customers/", json={"customer_name": name, "phone": "9999999999"}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+def invoice_payload(product_ids, quantity: int = 1, customer_id: int = None, **fields) -> dict:
+    return {
+        "customer_id": customer_id,
+        "items": [
+            {"product_id": product_id, "quantity": quantity, "unit_price": 10, "tax_percentage": 18}
+            for product_id in product_ids
+        ],
+        "payment_method": "cash",
+        **fields,
+    }
+
+@contextmanager
+def count_statements():
+    """Collect the SQL statements the engine sends while the block runs"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def seed_invoices(business_id: int, product_id: int, count: int):
+    """Bulk insert `count` one-line invoices straight into the tables"""
+    created_at = datetime.utcnow()
+    prefix = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        invoice_ids = db.scalars(insert(models.Invoice).returning(models.Invoice.id), [{
+            "business_id": business_id,
+            "invoice_number": f"SEED-{prefix}-{i}",
+            "subtotal": 100,
+            "tax_amount": 18,
+            "grand_total": 118,
+            "payment_method": models.PaymentMethod.CASH,
+            "payment_status": models.PaymentStatus.PAID,
+            "created_at": created_at,
+        } for i in range(count)]).all()
+        db.execute(insert(models.InvoiceItem), [{
+            "invoice_id": invoice_id,
+            "product_id": product_id,
+            "quantity": 10,
+            "unit_price": 10,
+            "unit_cost": 5,
+            "tax_percentage": 18,
+            "tax_amount": 18,
+            "total_amount": 118,
+        } for invoice_id in invoice_ids])
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,11 @@
+from conftest import signup
+
+def test_logout_all_revokes_tokens_already_issued(client):
+    headers = signup(client)
+    # Put the user in the principal cache so revocation has to evict it
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    response = client.post("/api/auth/logout-all", headers=headers)
+    assert response.status_code == 200, response.text
+
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
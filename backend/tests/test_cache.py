@@ -0,0 +1,113 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import select
+
+from cache import SingleFlight
+from conftest import count_statements
+from database import SessionLocal
+from report_cache import ReportCache
+
+CALLERS = 20
+
+def wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+def test_single_flight_runs_once_for_concurrent_callers():
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        futures = [pool.submit(flights.do, "key", compute) for _ in range(CALLERS)]
+        # Hold the leader until every other caller is waiting on it
+        wait_for(lambda: flights.stats()["shared"] == CALLERS - 1)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert calls == [1]
+    assert results == ["result"] * CALLERS
+    assert flights.stats() == {"in_flight": 0, "calls": 1, "shared": CALLERS - 1}
+
+    # Nothing is kept once the flight lands
+    assert flights.do("key", lambda: "again") == "again"
+
+def test_single_flight_shares_the_error():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        futures = [pool.submit(flights.do, "key", compute) for _ in range(CALLERS)]
+        wait_for(lambda: flights.stats()["shared"] == CALLERS - 1)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result()
+
+def test_concurrent_report_misses_run_one_query():
+    cache = ReportCache(max_entries=16, ttl=60)
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        db = SessionLocal()
+        try:
+            return db.execute(select(42)).scalar()
+        finally:
+            db.close()
+
+    with count_statements() as statements:
+        with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+            futures = [
+                pool.submit(cache.get_or_compute, 1, "report", (), compute) for _ in range(CALLERS)
+            ]
+            wait_for(lambda: cache.flights.stats()["shared"] == CALLERS - 1)
+            release.set()
+            results = [future.result() for future in futures]
+
+    assert results == [42] * CALLERS
+    assert len([s for s in statements if "42" in s]) == 1
+
+def test_replica_results_are_not_cached_right_after_a_write():
+    cache = ReportCache(max_entries=16, ttl=60, replica_lag=0.2)
+    cache.bump(1)
+
+    # A lagging replica's answer is served but not kept
+    assert cache.get_or_compute(1, "report", (), lambda: "stale", from_replica=True) == "stale"
+    assert cache.get_or_compute(1, "report", (), lambda: "fresh") == "fresh"
+    assert cache.get_or_compute(1, "report", (), lambda: "recomputed", from_replica=True) == "fresh"
+
+    cache.bump(1)
+    time.sleep(0.25)
+    assert cache.get_or_compute(1, "report", (), lambda: "caught up", from_replica=True) == "caught up"
+    assert cache.get_or_compute(1, "report", (), lambda: "recomputed") == "caught up"
+
+def test_primary_misses_do_not_join_a_replica_flight():
+    cache = ReportCache(max_entries=16, ttl=60, replica_lag=60)
+    cache.bump(1)
+    release = threading.Event()
+
+    def from_replica():
+        release.wait(5)
+        return "stale"
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        replica = pool.submit(cache.get_or_compute, 1, "report", (), from_replica, True)
+        wait_for(lambda: cache.flights.stats()["in_flight"] == 1)
+        assert cache.get_or_compute(1, "report", (), lambda: "fresh") == "fresh"
+        release.set()
+        assert replica.result() == "stale"
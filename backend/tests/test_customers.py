@@ -0,0 +1,70 @@
+from conftest import count_statements, create_customer, create_product, invoice_payload
+
+def test_deleting_invoices_reverses_customer_totals(client, headers):
+    product_id = create_product(client, headers)
+    customer_id = create_customer(client, headers)
+    unpaid = client.post(
+        "/api/invoices/", json=invoice_payload([product_id], customer_id=customer_id), headers=headers
+    ).json()
+    paid = client.post(
+        "/api/invoices/",
+        json=invoice_payload([product_id], customer_id=customer_id, payment_status="paid"),
+        headers=headers
+    ).json()
+    client.post(f"/api/invoices/{unpaid['id']}/payment", json={"amount": 5, "payment_method": "cash"}, headers=headers)
+
+    customer = client.get(f"/api/customers/{customer_id}", headers=headers).json()
+    assert customer["total_purchases"] == unpaid["grand_total"] + paid["grand_total"]
+    assert customer["total_outstanding"] == unpaid["grand_total"] - 5
+    assert customer["payment_status"] == "partial"
+
+    client.delete(f"/api/invoices/{unpaid['id']}", headers=headers)
+    customer = client.get(f"/api/customers/{customer_id}", headers=headers).json()
+    assert customer["total_purchases"] == paid["grand_total"]
+    assert customer["total_outstanding"] == 0
+    assert customer["payment_status"] == "paid"
+
+    client.delete(f"/api/invoices/{paid['id']}", headers=headers)
+    customer = client.get(f"/api/customers/{customer_id}", headers=headers).json()
+    assert customer["total_purchases"] == 0
+    assert customer["total_outstanding"] == 0
+
+def test_customer_list_query_count_does_not_grow_with_customers(client, headers):
+    product_id = create_product(client, headers)
+
+    def add_customers(count):
+        for i in range(count):
+            customer_id = create_customer(client, headers, f"Customer {i}")
+            client.post("/api/invoices/", json=invoice_payload([product_id], customer_id=customer_id), headers=headers)
+
+    def list_statements():
+        with count_statements() as statements:
+            response = client.get("/api/customers/", headers=headers)
+        assert response.status_code == 200, response.text
+        assert all(customer["invoice_numbers"] for customer in response.json())
+        return len(response.json()), len(statements)
+
+    add_customers(2)
+    customers_before, statements_before = list_statements()
+    add_customers(20)
+    customers_after, statements_after = list_statements()
+
+    assert customers_after == customers_before + 20
+    assert statements_after == statements_before
+
+def test_deleting_a_partial_invoice_leaves_no_outstanding(client, headers):
+    product_id = create_product(client, headers)
+    customer_id = create_customer(client, headers)
+    invoice = client.post(
+        "/api/invoices/",
+        json=invoice_payload([product_id], customer_id=customer_id, payment_status="partial", amount_paid=5),
+        headers=headers
+    ).json()
+
+    customer = client.get(f"/api/customers/{customer_id}", headers=headers).json()
+    assert customer["total_outstanding"] == invoice["balance_due"]
+
+    client.delete(f"/api/invoices/{invoice['id']}", headers=headers)
+    customer = client.get(f"/api/customers/{customer_id}", headers=headers).json()
+    assert customer["total_outstanding"] == 0
+    assert customer["total_purchases"] == 0
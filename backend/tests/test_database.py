@@ -0,0 +1,17 @@
+import pytest
+from sqlalchemy import select, text
+
+from database import SessionLocal, engine, statement_timeout
+
+@pytest.mark.skipif(engine.dialect.name != "postgresql", reason="statement_timeout is PostgreSQL only")
+@pytest.mark.parametrize("started", [False, True])
+def test_statement_timeout_applies_to_a_started_transaction(started):
+    db = SessionLocal()
+    try:
+        if started:
+            # As after a principal-cache miss in get_current_user
+            db.execute(select(1))
+        statement_timeout(1234)(db)
+        assert db.execute(text("SHOW statement_timeout")).scalar() == "1234ms"
+    finally:
+        db.close()
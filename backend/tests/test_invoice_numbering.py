@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from config import settings
+from conftest import invoice_payload, requires_row_locks
+import invoice_numbering
+from invoice_numbering import InvoiceNumberBlockPool
+
+CREATORS = 50
+
+@requires_row_locks
+def test_parallel_creates_get_unique_gap_free_numbers(client, headers):
+    # Create the business up front so every request numbers the same one. No
+    # line items, so no product row lock serializes the transactions.
+    client.post("/api/businesses/", json={"business_name": "Numbering"}, headers=headers)
+
+    def create(_):
+        response = client.post("/api/invoices/", json=invoice_payload([]), headers=headers)
+        assert response.status_code == 200, response.text
+        return response.json()["invoice_number"]
+
+    with ThreadPoolExecutor(max_workers=CREATORS) as pool:
+        numbers = list(pool.map(create, range(CREATORS)))
+
+    assert sorted(int(number.split("-")[-1]) for number in numbers) == list(range(1, CREATORS + 1))
+
+def test_block_pool_hands_out_each_number_once(client, headers):
+    client.post("/api/invoices/", json=invoice_payload([]), headers=headers)
+    business_id = client.get("/api/businesses/", headers=headers).json()[0]["id"]
+
+    # Two pools stand in for two worker processes sharing the counter
+    pools = [InvoiceNumberBlockPool(block_size=7), InvoiceNumberBlockPool(block_size=7)]
+    with ThreadPoolExecutor(max_workers=CREATORS) as executor:
+        numbers = list(executor.map(lambda i: pools[i % 2].next_number(business_id), range(CREATORS)))
+
+    assert len(set(numbers)) == CREATORS
+    assert min(numbers) == 2
+
+def test_block_pool_numbers_the_first_invoice_of_a_new_business(client, headers, monkeypatch):
+    monkeypatch.setattr(settings, "INVOICE_NUMBER_BLOCK_SIZE", 5)
+    monkeypatch.setattr(invoice_numbering, "_block_pool", InvoiceNumberBlockPool(block_size=5))
+
+    # The user has no business yet, so this request creates it uncommitted
+    for expected in (1, 2):
+        response = client.post("/api/invoices/", json=invoice_payload([]), headers=headers)
+        assert response.status_code == 200, response.text
+        assert response.json()["invoice_number"].endswith(f"-{expected:06d}")
@@ -0,0 +1,64 @@
+from conftest import count_statements, create_customer, create_product, invoice_payload
+
+def test_create_invoice_without_items(client, headers):
+    response = client.post("/api/invoices/", json=invoice_payload([]), headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["items"] == []
+    assert response.json()["grand_total"] == 0
+
+def test_create_invoice_round_trips_do_not_grow_with_lines(client, headers):
+    product_ids = [create_product(client, headers) for _ in range(20)]
+    # First invoice creates the number counter and the day's rollup row
+    client.post("/api/invoices/", json=invoice_payload(product_ids[:1]), headers=headers)
+
+    counts = {}
+    for lines in (1, 20):
+        with count_statements() as statements:
+            response = client.post("/api/invoices/", json=invoice_payload(product_ids[:lines]), headers=headers)
+        assert response.status_code == 200, response.text
+        assert len(response.json()["items"]) == lines
+        counts[lines] = len(statements)
+
+    assert counts[20] == counts[1]
+
+def test_marking_an_invoice_paid_settles_its_balance(client, headers):
+    product_id = create_product(client, headers)
+    customer_id = create_customer(client, headers)
+    invoice = client.post(
+        "/api/invoices/", json=invoice_payload([product_id], customer_id=customer_id), headers=headers
+    ).json()
+    assert invoice["amount_paid"] == 0
+
+    response = client.put(f"/api/invoices/{invoice['id']}", json={"payment_status": "paid"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["amount_paid"] == invoice["grand_total"]
+    assert response.json()["balance_due"] == 0
+
+    customer = client.get(f"/api/customers/{customer_id}", headers=headers).json()
+    assert customer["payment_status"] == "paid"
+    assert customer["total_outstanding"] == 0
+
+    response = client.put(f"/api/invoices/{invoice['id']}", json={"payment_status": "unpaid"}, headers=headers)
+    assert response.json()["amount_paid"] == 0
+    customer = client.get(f"/api/customers/{customer_id}", headers=headers).json()
+    assert customer["total_outstanding"] == invoice["grand_total"]
+
+def test_partial_invoices_record_the_amount_paid(client, headers):
+    product_id = create_product(client, headers)
+    customer_id = create_customer(client, headers)
+
+    response = client.post(
+        "/api/invoices/",
+        json=invoice_payload([product_id], customer_id=customer_id, payment_status="partial"),
+        headers=headers
+    )
+    assert response.status_code == 400
+
+    invoice = client.post(
+        "/api/invoices/",
+        json=invoice_payload([product_id], customer_id=customer_id, payment_status="partial", amount_paid=5),
+        headers=headers
+    ).json()
+    assert invoice["amount_paid"] == 5
+    customer = client.get(f"/api/customers/{customer_id}", headers=headers).json()
+    assert customer["total_outstanding"] == invoice["balance_due"]
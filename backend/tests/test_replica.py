@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Engines are built from settings at import, so the replica setup runs in a
+# fresh interpreter. The replica is a second SQLite file that never receives
+# the primary's rows, so a read shows which database answered it.
+SCRIPT = textwrap.dedent("""
+    import time
+    from fastapi.testclient import TestClient
+    import main
+    from database import Base, replica_engine
+
+    Base.metadata.create_all(bind=replica_engine)
+    client = TestClient(main.app)
+    client.post("/api/auth/signup", json={
+        "email": "replica@example.com", "username": "replica", "full_name": "Replica", "password": "secret1"
+    })
+    token = client.post(
+        "/api/auth/login", data={"username": "replica@example.com", "password": "secret1"}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.post("/api/products/", json={
+        "product_name": "Product", "sku": "REPLICA-1", "unit": "pc",
+        "buying_price": 5, "selling_price": 10, "current_stock": 10,
+    }, headers=headers)
+    assert response.status_code == 200, response.text
+
+    # Within the window the writer reads from the primary
+    assert len(client.get("/api/products/", headers=headers).json()) == 1
+
+    # After it, reads go back to the (lagging) replica
+    time.sleep(1.5)
+    assert client.get("/api/products/", headers=headers).json() == []
+""")
+
+def test_reads_follow_the_writer_to_the_primary_then_return_to_the_replica(tmp_path):
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path}/primary.db",
+        "DATABASE_REPLICA_URL": f"sqlite:///{tmp_path}/replica.db",
+        "READ_YOUR_WRITES_SECONDS": "1",
+        # Read-your-writes must not depend on the principal cache
+        "PRINCIPAL_CACHE_MAX_ENTRIES": "0",
+        "PDF_CACHE_DIR": str(tmp_path / "pdf_cache"),
+        "PYTHONPATH": BACKEND_DIR,
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
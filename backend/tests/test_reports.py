@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+
+from auth import principal_cache
+from conftest import create_product, signup
+from database import engine
+from routes import reports
+from tenant import business_id_cache
+
+def test_dashboard_request_holds_no_connection_while_widgets_run(client, headers, monkeypatch):
+    create_product(client, headers)
+    checked_out = []
+
+    def widget(db, business_id, period):
+        db.execute(select(1))
+        checked_out.append(engine.pool.checkedout())
+        return {}
+
+    # One widget at a time, so the only other connection would be the request's
+    monkeypatch.setattr(reports, "_dashboard_executor", ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setitem(reports.DASHBOARD_WIDGETS, "low_stock", (widget, []))
+    monkeypatch.setitem(reports.DASHBOARD_WIDGETS, "top_customers", (widget, {}))
+    # Cold caches make auth and tenant resolution query the request session
+    principal_cache.clear()
+    business_id_cache.clear()
+
+    response = client.get("/api/reports/dashboard?fields=low_stock,top_customers", headers=headers)
+    assert response.status_code == 200, response.text
+    assert checked_out == [1, 1]
+
+def test_sales_summary_without_business_has_the_same_shape(client, headers):
+    create_product(client, headers)
+    with_business = client.get("/api/reports/sales/summary?period=monthly", headers=headers).json()
+
+    response = client.get("/api/reports/sales/summary?period=monthly", headers=signup(client))
+    assert response.status_code == 200, response.text
+    assert response.json().keys() == with_business.keys()
+    assert response.json()["start_date"] == with_business["start_date"]
+    assert response.json()["total_orders"] == 0
+
+def test_dashboard_without_business_has_the_same_shape(client, headers):
+    create_product(client, headers)
+    url = "/api/reports/dashboard?fields=sales_summary,bestsellers&period=weekly"
+    with_business = client.get(url, headers=headers).json()
+
+    response = client.get(url, headers=signup(client))
+    assert response.status_code == 200, response.text
+    summary = response.json()["sales_summary"]
+    assert summary.keys() == with_business["sales_summary"].keys()
+    assert summary["period"] == "weekly"
+    assert summary["start_date"] == with_business["sales_summary"]["start_date"]
+    assert response.json()["bestsellers"].keys() == with_business["bestsellers"].keys()
@@ -0,0 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import create_product, invoice_payload, requires_row_locks
+
+BUYERS = 50
+STOCK = 20
+
+@requires_row_locks
+def test_concurrent_sales_never_oversell(client, headers):
+    first = create_product(client, headers, stock=STOCK)
+    second = create_product(client, headers, stock=STOCK)
+
+    def buy(i):
+        # Half the bills list the products in the opposite order
+        product_ids = [first, second] if i % 2 else [second, first]
+        return client.post("/api/invoices/", json=invoice_payload(product_ids), headers=headers).status_code
+
+    with ThreadPoolExecutor(max_workers=BUYERS) as pool:
+        statuses = list(pool.map(buy, range(BUYERS)))
+
+    assert statuses.count(200) == STOCK
+    assert statuses.count(400) == BUYERS - STOCK
+
+    products = {p["id"]: p for p in client.get("/api/products/", headers=headers).json()}
+    assert products[first]["current_stock"] == 0
+    assert products[second]["current_stock"] == 0
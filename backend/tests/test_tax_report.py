@@ -0,0 +1,30 @@
+import csv
+import io
+
+from conftest import create_product, seed_invoices
+from database import SessionLocal
+from routes.reports import _tax_csv_rows
+
+CSV_INVOICES = 3000
+
+def test_tax_csv_is_streamed_in_chunks(client, headers):
+    product_id = create_product(client, headers)
+    business_id = client.get("/api/businesses/", headers=headers).json()[0]["id"]
+    seed_invoices(business_id, product_id, CSV_INVOICES)
+
+    db = SessionLocal()
+    try:
+        chunks = list(_tax_csv_rows(db, business_id, None, None))
+    finally:
+        db.close()
+
+    # Rows are flushed every 64 KiB instead of being built up in one string
+    assert len(chunks) > 1
+    assert max(len(chunk) for chunk in chunks) < 65 * 1024
+
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert len(rows) == CSV_INVOICES + 1
+
+    response = client.get(f"/api/reports/tax/summary?business_id={business_id}&format=csv", headers=headers)
+    assert response.status_code == 200
+    assert response.text == "".join(chunks)
@@ -11,6 +11,7 @@ export const authAPI = {
       headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
     }),
   getCurrentUser: () => api.get('/api/auth/me'),
+  logoutAll: () => api.post('/api/auth/logout-all'),
   forgotPassword: (email) => api.post('/api/auth/forgot-password', { email }),
 };
 
@@ -51,7 +52,9 @@ export const invoicesAPI = {
   delete: (id) => api.delete(`/api/invoices/${id}`).then(res => res.data),
   addPayment: (id, payment) => api.post(`/api/invoices/${id}/payment`, payment).then(res => res.data),
   getPayments: (id) => api.get(`/api/invoices/${id}/payments`).then(res => res.data),
-  downloadPDF: (id) => api.get(`/api/invoices/${id}/pdf`, { responseType: 'blob' }),
+  downloadPDF: (id, layout = 'invoice') =>
+    api.get(`/api/invoices/${id}/pdf`, { params: { layout }, responseType: 'blob' }),
+  exportPDFs: (filter = {}) => api.post('/api/invoices/export/pdf', filter, { responseType: 'blob' }),
 };
 
 // Reports APIs
@@ -60,9 +63,17 @@ export const reportsAPI = {
     api.get('/api/reports/sales/summary', {
       params: { business_id: businessId, period },
     }).then(res => res.data),
-  inventoryValue: (businessId) =>
+  dashboard: (businessId, fields, period = 'daily') =>
+    api.get('/api/reports/dashboard', {
+      params: { business_id: businessId, fields: fields ? fields.join(',') : undefined, period },
+    }).then(res => res.data),
+  salesTimeseries: (businessId, { startDate, endDate, bucket = 'day' } = {}) =>
+    api.get('/api/reports/sales/timeseries', {
+      params: { business_id: businessId, start_date: startDate, end_date: endDate, bucket },
+    }).then(res => res.data),
+  inventoryValue: (businessId, includeLowStock = false) =>
     api.get('/api/reports/inventory/value', {
-      params: { business_id: businessId },
+      params: { business_id: businessId, include_low_stock: includeLowStock },
     }).then(res => res.data),
   bestsellers: (businessId, period = 'monthly', limit = 10) =>
     api.get('/api/reports/products/bestsellers', {
@@ -80,6 +91,11 @@ export const reportsAPI = {
     api.get('/api/reports/tax/summary', {
       params: { business_id: businessId, start_date: startDate, end_date: endDate },
     }).then(res => res.data),
+  taxSummaryCSV: (businessId, startDate, endDate) =>
+    api.get('/api/reports/tax/summary', {
+      params: { business_id: businessId, start_date: startDate, end_date: endDate, format: 'csv' },
+      responseType: 'blob',
+    }),
 };
 
 // Business APIs
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { TrendingUp, Package, Users, FileText, AlertCircle, DollarSign } from 'lucide-react';
 import { useBusinessStore } from '../store';
-import { reportsAPI, productsAPI, customersAPI, invoicesAPI } from '../api';
+import { reportsAPI, customersAPI, invoicesAPI } from '../api';
 import { useNavigate } from 'react-router-dom';
 
 const StatCard = ({ icon: Icon, label, value, trend, color, loading }) => (
@@ -58,33 +58,15 @@ export const DashboardPage = () => {
       
       console.log('Loading dashboard for business:', businessId);
 
-      const [salesData, inventoryData, lowStockData, customersData, invoicesData] = await Promise.all([
-        reportsAPI.salesSummary(businessId, 'daily')
+      const [dashboardData, customersData, invoicesData] = await Promise.all([
+        reportsAPI.dashboard(businessId, ['sales_summary', 'inventory_value', 'low_stock'])
           .then(data => {
-            console.log('Sales data:', data);
+            console.log('Dashboard data:', data);
             return data;
           })
           .catch(e => {
-            console.error('Sales error:', e);
-            return { total_revenue: 0, total_orders: 0 };
-          }),
-        reportsAPI.inventoryValue(businessId)
-          .then(data => {
-            console.log('Inventory data:', data);
-            return data;
-          })
-          .catch(e => {
-            console.error('Inventory error:', e);
-            return { total_capital_value: 0, total_items: 0, total_stock: 0 };
-          }),
-        productsAPI.getLowStock(5)
-          .then(data => {
-            console.log('Low stock data:', data);
-            return data;
-          })
-          .catch(e => {
-            console.error('Low stock error:', e);
-            return [];
+            console.error('Dashboard error:', e);
+            return {};
           }),
         customersAPI.list({ limit: 1000 })
           .then(data => {
@@ -106,6 +88,10 @@ export const DashboardPage = () => {
           }),
       ]);
 
+      const salesData = dashboardData.sales_summary;
+      const inventoryData = dashboardData.inventory_value;
+      const lowStockData = dashboardData.low_stock;
+
       console.log('Setting stats:', { salesData, inventoryData });
 
       setStats({